@@ -0,0 +1,259 @@
+"""Local stand-in for the Luke Roberts Cloud API with fault injection.
+
+Serves the three official endpoints under /api/v1:
+
+- GET /lamps
+- GET /lamps/{lamp_id}/state
+- PUT /lamps/{lamp_id}/command
+
+and, if enabled, an event stream of state changes at GET /lamps/events.
+
+Every response can be delayed (latency plus jitter) and replaced by an
+injected HTTP error. Commands go through a simulated smartphone BLE bridge:
+a command sent while the bridge is cold only starts connecting it and is
+dropped, like on the real cloud. Once connected, the bridge forwards
+commands until it was idle for keep_alive seconds.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+import json
+import random
+import time
+from typing import Any
+
+from aiohttp import web
+
+API_PREFIX = "/api/v1"
+
+
+@dataclass
+class FaultProfile:
+    """Latency and error behaviour of the fake cloud."""
+
+    latency: float = 0.05  # Seconds added to every response
+    jitter: float = 0.02  # Up to this many seconds added at random
+    error_rates: dict[int, float] = field(default_factory=dict)  # HTTP status -> probability
+    retry_after: float = 1.0  # Retry-After header of injected 429 responses
+    wake_delay: float = 1.5  # Seconds the BLE bridge needs to connect
+    keep_alive: float = 10.0  # Seconds the BLE bridge stays connected when idle
+    listing_includes_state: bool = False  # Whether GET /lamps embeds each lamp state
+    push: bool = False  # Whether GET /lamps/events streams state changes, 404 otherwise
+    heartbeat: float = 15.0  # Seconds between heartbeats on an idle event stream
+
+
+@dataclass
+class FakeLamp:
+    """State of one simulated lamp and its BLE bridge."""
+
+    lamp_id: int
+    on: bool = False
+    brightness: int = 28
+    kelvin: int = 3000
+    scene: int = 0
+    online: bool = True
+    updated_at: str = field(default_factory=lambda: _timestamp())
+    bridge_ready_at: float = 0.0
+    bridge_idle_until: float = 0.0
+    applied: int = 0
+    dropped: int = 0
+
+    def as_state(self) -> dict[str, Any]:
+        """Return the lamp state in the format of the cloud."""
+        return {
+            "on": self.on,
+            "online": self.online,
+            "brightness": self.brightness,
+            "color": {"temperatureK": self.kelvin},
+            "updated_at": self.updated_at,
+        }
+
+    def apply(self, command: dict[str, Any]) -> None:
+        """Apply a single-parameter command."""
+        if "power" in command:
+            self.on = command["power"] == "ON"
+        if "brightness" in command:
+            self.brightness = int(command["brightness"])
+            self.on = True
+        if "kelvin" in command:
+            self.kelvin = int(command["kelvin"])
+        if "scene" in command:
+            self.scene = int(command["scene"])
+            self.on = self.scene != 0
+        self.updated_at = _timestamp()
+        self.applied += 1
+
+
+def _timestamp() -> str:
+    """Return the current time in the format of the cloud."""
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+class FakeCloud:
+    """In-process HTTP server emulating the Luke Roberts Cloud API."""
+
+    def __init__(
+        self,
+        lamp_ids: list[int],
+        profile: FaultProfile | None = None,
+        token: str = "bench-token",
+        seed: int | None = None,
+    ) -> None:
+        """Initialize the fake cloud."""
+        self.profile = profile or FaultProfile()
+        self.token = token
+        self.lamps = {lamp_id: FakeLamp(lamp_id) for lamp_id in lamp_ids}
+        # Requests per (method, route) and injected errors per status
+        self.requests: Counter[tuple[str, str]] = Counter()
+        self.injected: Counter[int] = Counter()
+        self._random = random.Random(seed)
+        self._runner: web.AppRunner | None = None
+        # Queues of the open event streams, None closes a stream
+        self._subscribers: set[asyncio.Queue[FakeLamp | None]] = set()
+        self.base_url = ""
+
+        self.app = web.Application(middlewares=[self._middleware])
+        self.app.router.add_get(f"{API_PREFIX}/lamps", self._handle_lamps)
+        self.app.router.add_get(f"{API_PREFIX}/lamps/events", self._handle_events)
+        self.app.router.add_get(f"{API_PREFIX}/lamps/{{lamp_id}}/state", self._handle_state)
+        self.app.router.add_put(f"{API_PREFIX}/lamps/{{lamp_id}}/command", self._handle_command)
+
+    async def start(self) -> str:
+        """Start serving on a free local port and return the API base URL."""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]  # noqa: SLF001
+        self.base_url = f"http://127.0.0.1:{port}{API_PREFIX}"
+        return self.base_url
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        for queue in self._subscribers:
+            queue.put_nowait(None)
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @property
+    def total_requests(self) -> int:
+        """Return the number of requests served, including injected errors."""
+        return sum(self.requests.values())
+
+    def reset_counters(self) -> None:
+        """Reset request and error counters between workloads."""
+        self.requests.clear()
+        self.injected.clear()
+        for lamp in self.lamps.values():
+            lamp.applied = 0
+            lamp.dropped = 0
+
+    def change_lamp(self, lamp_id: int, command: dict[str, Any]) -> None:
+        """Change a lamp outside of the API, like the app or a wall switch."""
+        lamp = self.lamps[lamp_id]
+        lamp.apply(command)
+        self._publish(lamp)
+
+    def _publish(self, lamp: FakeLamp) -> None:
+        """Send the state of a lamp to all open event streams."""
+        for queue in self._subscribers:
+            queue.put_nowait(lamp)
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler: Any) -> web.StreamResponse:
+        """Count the request, add latency and inject faults."""
+        route = request.match_info.route.resource.canonical if request.match_info.route.resource else "?"
+        self.requests[(request.method, route.removeprefix(API_PREFIX))] += 1
+
+        profile = self.profile
+        await asyncio.sleep(profile.latency + self._random.uniform(0, profile.jitter))
+
+        if request.headers.get("Authorization") != f"Bearer {self.token}":
+            return web.json_response({"error": "unauthorized"}, status=401)
+
+        for status, rate in profile.error_rates.items():
+            if rate and self._random.random() < rate:
+                self.injected[status] += 1
+                headers = {"Retry-After": str(profile.retry_after)} if status == 429 else None
+                return web.json_response({"error": "injected"}, status=status, headers=headers)
+
+        return await handler(request)
+
+    def _lamp(self, request: web.Request) -> FakeLamp:
+        """Return the lamp addressed by a request or raise 404."""
+        try:
+            return self.lamps[int(request.match_info["lamp_id"])]
+        except (KeyError, ValueError):
+            raise web.HTTPNotFound() from None
+
+    async def _handle_lamps(self, request: web.Request) -> web.Response:
+        """Handle GET /lamps."""
+        lamps = []
+        for lamp in self.lamps.values():
+            item: dict[str, Any] = {"id": lamp.lamp_id, "name": f"Lamp {lamp.lamp_id}"}
+            if self.profile.listing_includes_state:
+                item["state"] = lamp.as_state()
+            lamps.append(item)
+        return web.json_response(lamps)
+
+    async def _handle_events(self, request: web.Request) -> web.StreamResponse:
+        """Handle GET /lamps/events as server-sent events.
+
+        Starts with the state of every lamp, then sends each change.
+        """
+        if not self.profile.push:
+            raise web.HTTPNotFound()
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        queue: asyncio.Queue[FakeLamp | None] = asyncio.Queue()
+        for lamp in self.lamps.values():
+            queue.put_nowait(lamp)
+        self._subscribers.add(queue)
+        try:
+            while True:
+                try:
+                    lamp = await asyncio.wait_for(queue.get(), self.profile.heartbeat)
+                except asyncio.TimeoutError:
+                    await response.write(b": ping\n\n")
+                    continue
+                if lamp is None:
+                    break
+                event = {"id": lamp.lamp_id, "state": lamp.as_state()}
+                await response.write(f"data: {json.dumps(event)}\n\n".encode())
+        except ConnectionResetError:
+            pass
+        finally:
+            self._subscribers.discard(queue)
+        return response
+
+    async def _handle_state(self, request: web.Request) -> web.Response:
+        """Handle GET /lamps/{lamp_id}/state."""
+        return web.json_response(self._lamp(request).as_state())
+
+    async def _handle_command(self, request: web.Request) -> web.Response:
+        """Handle PUT /lamps/{lamp_id}/command through the simulated bridge."""
+        lamp = self._lamp(request)
+        command = await request.json()
+
+        now = time.monotonic()
+        if not lamp.online:
+            lamp.dropped += 1
+        elif now >= lamp.bridge_idle_until:
+            # Bridge is cold: this command only starts connecting it
+            lamp.bridge_ready_at = now + self.profile.wake_delay
+            lamp.dropped += 1
+        elif now < lamp.bridge_ready_at:
+            # Bridge is still connecting
+            lamp.dropped += 1
+        else:
+            lamp.apply(command)
+            self._publish(lamp)
+        lamp.bridge_idle_until = max(lamp.bridge_idle_until, now + self.profile.keep_alive)
+
+        # Commands are only enqueued, the cloud never reports the outcome
+        return web.Response(status=204)
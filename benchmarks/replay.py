@@ -0,0 +1,270 @@
+"""Replay a recorded trace of real cloud traffic offline.
+
+A trace is recorded in Home Assistant with the luke_roberts.record service.
+The replay serves the recorded responses from a local stand-in of the cloud
+with their original latencies, and re-issues the recorded command batches
+through the current API client at their original offsets. Comparing the
+request counts and command latencies of the trace and of the replay shows
+how a change to the command path behaves on a real-world session:
+
+    python -m benchmarks.replay luke_roberts_trace_20260101_120000.jsonl.gz
+    python -m benchmarks.replay trace.jsonl.gz --confirm --speed 4 --json result.json
+
+With --speed, the recorded latencies and offsets and the client wake
+delay and keep-warm time are all shortened by the same factor, and the
+replayed latencies are scaled back for the comparison. Confirmation
+timings and the request rate limit are not scaled, so fast replays with
+--confirm or near the rate limit compare less exactly.
+
+Polls are not replayed, so GET requests of the replay are read-backs of
+the command path only. The stand-in does not simulate the BLE bridge,
+whether a command reached the lamp is whatever the trace says.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import Counter, defaultdict
+import json
+import logging
+import re
+import time
+from typing import Any
+
+from aiohttp import web
+
+from custom_components.luke_roberts.account import LukeRobertsAccount
+from custom_components.luke_roberts.api import LukeRobertsApi
+from custom_components.luke_roberts.const import (
+    API_TIMEOUT,
+    BLE_WAKE_DELAY,
+    DEFAULT_KEEP_WARM,
+    ENDPOINT_LAMP_COMMAND,
+    ENDPOINT_LAMP_EVENTS,
+    ENDPOINT_LAMP_STATE,
+    ENDPOINT_LAMPS,
+)
+from custom_components.luke_roberts.recorder import load_trace
+
+from .fake_cloud import API_PREFIX
+from .run import percentile
+
+TOKEN = "replay-token"
+
+_LAMP_PATH = re.compile(r"^/lamps/(\d+)/(state|command)$")
+
+
+def _template(path: str) -> tuple[str, int | None]:
+    """Return the endpoint template and lamp ID of a request path."""
+    if path == ENDPOINT_LAMPS:
+        return ENDPOINT_LAMPS, None
+    if path == ENDPOINT_LAMP_EVENTS:
+        return ENDPOINT_LAMP_EVENTS, None
+    match = _LAMP_PATH.match(path)
+    if match is None:
+        return path, None
+    endpoint = ENDPOINT_LAMP_STATE if match.group(2) == "state" else ENDPOINT_LAMP_COMMAND
+    return endpoint, int(match.group(1))
+
+
+class ReplayCloud:
+    """In-process HTTP server answering with the responses of a trace.
+
+    Requests are matched to recorded ones by method, endpoint template and
+    lamp, in recorded order. Once the recorded responses of a request are
+    used up, the last one is repeated. Lamp-independent endpoints match
+    records of any lamp. Requests without any recorded counterpart get 404.
+    """
+
+    def __init__(self, records: list[dict[str, Any]], speed: float = 1.0) -> None:
+        """Initialize the stand-in from the request records of a trace."""
+        self.speed = speed
+        self._responses: dict[tuple[str, str, int | None], list[dict[str, Any]]] = defaultdict(list)
+        self._served: Counter[tuple[str, str, int | None]] = Counter()
+        for record in records:
+            if record["k"] != "req":
+                continue
+            lamp = record["lamp"] if record["e"] in (ENDPOINT_LAMP_STATE, ENDPOINT_LAMP_COMMAND) else None
+            self._responses[(record["m"], record["e"], lamp)].append(record)
+        self.requests: Counter[tuple[str, str]] = Counter()
+        self._runner: web.AppRunner | None = None
+        self.base_url = ""
+
+        self.app = web.Application()
+        self.app.router.add_route("*", f"{API_PREFIX}/{{tail:.*}}", self._handle)
+
+    async def start(self) -> str:
+        """Start serving on a free local port and return the API base URL."""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]  # noqa: SLF001
+        self.base_url = f"http://127.0.0.1:{port}{API_PREFIX}"
+        return self.base_url
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def _next(self, key: tuple[str, str, int | None]) -> dict[str, Any] | None:
+        """Return the recorded response for the next request of a kind."""
+        responses = self._responses.get(key)
+        if not responses:
+            return None
+        index = min(self._served[key], len(responses) - 1)
+        self._served[key] += 1
+        return responses[index]
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        """Answer a request with its recorded response after its recorded latency."""
+        endpoint, lamp = _template(request.path.removeprefix(API_PREFIX))
+        self.requests[(request.method, endpoint)] += 1
+        record = self._next((request.method, endpoint, lamp))
+        if record is None:
+            return web.json_response({"error": "not in trace"}, status=404)
+
+        status = record["s"]
+        if status == "timeout":
+            # Outlast the client timeout, however fast the replay runs
+            await asyncio.sleep(API_TIMEOUT + 1)
+            return web.Response(status=504)
+        await asyncio.sleep(record["d"] / self.speed)
+        if status == "error":
+            if request.transport is not None:
+                request.transport.close()
+            return web.Response(status=502)
+        if status == 204 or record["r"] is None:
+            return web.Response(status=status)
+        headers = {"Retry-After": "1"} if status == 429 else None
+        return web.json_response(record["r"], status=status, headers=headers)
+
+
+async def replay(args: argparse.Namespace) -> dict[str, Any]:
+    """Replay the command batches of a trace and compare with the recording."""
+    header, records = await asyncio.get_running_loop().run_in_executor(None, load_trace, args.trace)
+    batches = [record for record in records if record["k"] == "cmd"]
+    recorded_requests: Counter[tuple[str, str]] = Counter(
+        (record["m"], record["e"]) for record in records if record["k"] == "req"
+    )
+
+    cloud = ReplayCloud(records, args.speed)
+    await cloud.start()
+    account = LukeRobertsAccount(TOKEN)
+    apis: dict[int, LukeRobertsApi] = {}
+    for lamp_id in sorted({record["lamp"] for record in batches}):
+        api = LukeRobertsApi(
+            api_token=TOKEN,
+            lamp_id=lamp_id,
+            session=account.session,
+            # Client timings run at the speed of the replay, like the recorded ones
+            keep_warm=args.keep_warm / args.speed,
+            base_url=cloud.base_url,
+            rate_limiter=account.rate_limiter,
+            circuit_breaker=account.circuit_breaker,
+        )
+        api.wake_delay = args.client_wake_delay / args.speed
+        api.confirm_commands = args.confirm
+        apis[lamp_id] = api
+
+    latencies: list[float] = []
+    failed = 0
+
+    async def send(batch: dict[str, Any]) -> None:
+        nonlocal failed
+        await asyncio.sleep(max(0.0, start + batch["t"] / args.speed - time.monotonic()))
+        sent = time.monotonic()
+        try:
+            await apis[batch["lamp"]].queue_commands(batch["c"])
+        except Exception:  # noqa: BLE001
+            failed += 1
+            return
+        latencies.append(time.monotonic() - sent)
+
+    start = time.monotonic()
+    try:
+        await asyncio.gather(*(send(batch) for batch in batches))
+        duration = time.monotonic() - start
+    finally:
+        for api in apis.values():
+            await api.close()
+        await account.session.close()
+        await cloud.stop()
+
+    recorded_latencies = [record["d"] for record in batches if record["ok"]]
+    return {
+        "trace": args.trace,
+        "recorded_at": header.get("started"),
+        "batches": len(batches),
+        "lamps": len(apis),
+        "recorded": {
+            "failed": sum(not record["ok"] for record in batches),
+            "p50": percentile(recorded_latencies, 0.5),
+            "p99": percentile(recorded_latencies, 0.99),
+            "requests_per_endpoint": {
+                f"{method} {endpoint}": count for (method, endpoint), count in recorded_requests.items()
+            },
+        },
+        "replayed": {
+            "duration": round(duration, 3),
+            "failed": failed,
+            "p50": percentile(latencies, 0.5),
+            "p99": percentile(latencies, 0.99),
+            "requests_per_endpoint": {
+                f"{method} {endpoint}": count for (method, endpoint), count in cloud.requests.items()
+            },
+        },
+    }
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse the command line."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("trace", help="trace file written by the luke_roberts.record service")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay faster than recorded by this factor")
+    parser.add_argument("--client-wake-delay", type=float, default=BLE_WAKE_DELAY, help="client wake delay")
+    parser.add_argument("--keep-warm", type=float, default=DEFAULT_KEEP_WARM, help="client keep warm time")
+    parser.add_argument("--confirm", action="store_true", help="confirm commands by state read-back")
+    parser.add_argument("--json", metavar="FILE", help="also write the result as JSON")
+    return parser.parse_args(argv)
+
+
+def print_result(result: dict[str, Any], speed: float) -> None:
+    """Print the comparison as a short report."""
+
+    def ms(value: float | None) -> str:
+        return "-" if value is None else f"{value * 1000:.0f} ms"
+
+    recorded, replayed = result["recorded"], result["replayed"]
+    print(f"== replay of {result['trace']} ({result['batches']} batches, {result['lamps']} lamps) ==")
+    print(f"  recorded     p50 {ms(recorded['p50'])}  p99 {ms(recorded['p99'])}  failed {recorded['failed']}")
+    # Latencies of a faster replay are scaled back to compare with the recording
+    print(
+        f"  replayed     p50 {ms(replayed['p50'] and replayed['p50'] * speed)}  "
+        f"p99 {ms(replayed['p99'] and replayed['p99'] * speed)}  failed {replayed['failed']}"
+    )
+    print(f"  {'requests':<32} {'recorded':>9} {'replayed':>9}")
+    endpoints = sorted({*recorded["requests_per_endpoint"], *replayed["requests_per_endpoint"]})
+    for endpoint in endpoints:
+        print(
+            f"    {endpoint:<30} {recorded['requests_per_endpoint'].get(endpoint, 0):>9} "
+            f"{replayed['requests_per_endpoint'].get(endpoint, 0):>9}"
+        )
+
+
+async def main(argv: list[str] | None = None) -> dict[str, Any]:
+    """Replay a trace and print the comparison."""
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.CRITICAL)
+    result = await replay(args)
+    print_result(result, args.speed)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(result, file, indent=2)
+    return result
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,430 @@
+"""Benchmark the Luke Roberts client and light entity against the fake cloud.
+
+Runs realistic workloads across N lamps without any network access and
+reports throughput, p50/p99 latency, request counts and whether every lamp
+reached the requested state. Requires Home Assistant to be installed:
+
+    python -m benchmarks.run --lamps 30
+    python -m benchmarks.run --scenario slider --error-rate 500=0.05 --json result.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import Counter
+from dataclasses import dataclass, field
+import inspect
+import json
+import logging
+import tempfile
+import time
+from types import MappingProxyType
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import __version__ as HA_VERSION
+from homeassistant.core import HomeAssistant
+
+from custom_components.luke_roberts.account import LukeRobertsAccount
+from custom_components.luke_roberts.api import LukeRobertsApi
+from custom_components.luke_roberts.const import (
+    BLE_WAKE_DELAY,
+    CONF_API_TOKEN,
+    CONF_DEVICE_NAME,
+    CONF_LAMP_ID,
+    DOMAIN,
+)
+from custom_components.luke_roberts.coordinator import LukeRobertsCoordinator
+from custom_components.luke_roberts.light import (
+    LukeRobertsGroupLight,
+    LukeRobertsLight,
+    ha_to_lamp_brightness,
+)
+from custom_components.luke_roberts.wake import WakeDelayTuner
+
+from .fake_cloud import FakeCloud, FaultProfile
+
+SCENARIOS = ("slider", "mass_on", "group", "polling", "external")
+FIRST_LAMP_ID = 1000
+
+
+def percentile(values: list[float], fraction: float) -> float | None:
+    """Return a percentile of the values by nearest rank."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def create_config_entry(lamp_id: int, token: str) -> ConfigEntry:
+    """Return a config entry of a lamp, for the Home Assistant version installed.
+
+    Newer versions require keyword arguments older ones do not accept,
+    only the ones the installed ConfigEntry takes are passed.
+    """
+    kwargs: dict[str, Any] = {
+        "version": 1,
+        "minor_version": 1,
+        "domain": DOMAIN,
+        "title": f"Lamp {lamp_id}",
+        "data": {CONF_API_TOKEN: token, CONF_LAMP_ID: lamp_id, CONF_DEVICE_NAME: f"Lamp {lamp_id}"},
+        "source": "user",
+        "options": {},
+        "unique_id": str(lamp_id),
+        "discovery_keys": MappingProxyType({}),
+        "subentries_data": None,
+    }
+    parameters = inspect.signature(ConfigEntry).parameters
+    return ConfigEntry(**{key: value for key, value in kwargs.items() if key in parameters})
+
+
+@dataclass
+class Result:
+    """Outcome of one workload."""
+
+    scenario: str
+    lamps: int
+    operations: int = 0
+    duration: float = 0.0
+    latencies: list[float] = field(default_factory=list)
+    requests: Counter[tuple[str, str]] = field(default_factory=Counter)
+    injected: Counter[int] = field(default_factory=Counter)
+    state_writes: int = 0
+    converged: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the result as a JSON serializable dict."""
+        return {
+            "homeassistant": HA_VERSION,
+            "scenario": self.scenario,
+            "lamps": self.lamps,
+            "operations": self.operations,
+            "duration": round(self.duration, 3),
+            "throughput": round(self.operations / self.duration, 2) if self.duration else None,
+            "p50": percentile(self.latencies, 0.5),
+            "p99": percentile(self.latencies, 0.99),
+            "requests": sum(self.requests.values()),
+            "requests_per_endpoint": {f"{method} {route}": count for (method, route), count in self.requests.items()},
+            "injected_errors": dict(self.injected),
+            "state_writes": self.state_writes,
+            "converged": f"{self.converged}/{self.lamps}",
+        }
+
+
+class Bench:
+    """Light entities of one account wired to a fake cloud."""
+
+    def __init__(self, hass: HomeAssistant, cloud: FakeCloud, args: argparse.Namespace) -> None:
+        """Initialize the bench."""
+        self.hass = hass
+        self.cloud = cloud
+        self.args = args
+        self.account = LukeRobertsAccount(cloud.token)
+        self.coordinator = LukeRobertsCoordinator(hass, cloud.token)
+        self.lights: list[LukeRobertsLight] = []
+        self.state_writes = 0
+
+    async def async_setup(self) -> None:
+        """Create one API client and light entity per fake lamp."""
+        apis = []
+        for lamp_id in self.cloud.lamps:
+            api = LukeRobertsApi(
+                api_token=self.cloud.token,
+                lamp_id=lamp_id,
+                session=self.account.session,
+                base_url=self.cloud.base_url,
+                rate_limiter=self.account.rate_limiter,
+                circuit_breaker=self.account.circuit_breaker,
+            )
+            api.wake_delay = self.args.client_wake_delay
+            if self.args.learn_wake_delay:
+                api.set_wake_tuner(WakeDelayTuner(self.args.client_wake_delay))
+            api.confirm_commands = self.args.confirm
+            self.coordinator.async_add_lamp(api)
+            apis.append(api)
+
+        # Wait for the initial state fetched in the background, like on startup
+        await self.coordinator._startup_refresh  # noqa: SLF001
+
+        for api in apis:
+            lamp_id = api.lamp_id
+            entry = create_config_entry(lamp_id, self.cloud.token)
+            light = LukeRobertsLight(self.coordinator, api, f"Lamp {lamp_id}", lamp_id, entry)
+            light.hass = self.hass
+            light.entity_id = f"light.bench_lamp_{lamp_id}"
+            # Count state writes instead of writing to a state machine
+            light.async_write_ha_state = self._count_state_write
+            light._apply_state(self.coordinator.data[lamp_id])  # noqa: SLF001
+            self.lights.append(light)
+            self.account.lights[lamp_id] = light
+
+    def _count_state_write(self) -> None:
+        """Stand in for async_write_ha_state."""
+        self.state_writes += 1
+
+    async def async_close(self) -> None:
+        """Cancel pending commands and close the session."""
+        for light in self.lights:
+            await light._api.close()  # noqa: SLF001
+        await self.account.session.close()
+
+
+async def run_slider(bench: Bench, result: Result) -> None:
+    """Drag the brightness slider of every lamp at the same time."""
+    steps = bench.args.slider_steps
+    targets = [int(255 * (step + 1) / steps) for step in range(steps)]
+
+    async def drag(light: LukeRobertsLight) -> None:
+        tasks = []
+        for brightness in targets:
+            tasks.append(asyncio.create_task(light.async_turn_on(brightness=brightness)))
+            await asyncio.sleep(bench.args.slider_interval)
+        released = time.monotonic()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        result.latencies.append(time.monotonic() - released)
+
+    for lamp in bench.cloud.lamps.values():
+        lamp.on = True
+    for light in bench.lights:
+        light._attr_is_on = True  # noqa: SLF001
+
+    await asyncio.gather(*(drag(light) for light in bench.lights))
+    result.operations = steps * len(bench.lights)
+    expected = ha_to_lamp_brightness(targets[-1])
+    result.converged = sum(lamp.brightness == expected for lamp in bench.cloud.lamps.values())
+
+
+async def run_mass_on(bench: Bench, result: Result) -> None:
+    """Turn on every lamp with brightness and color temperature at once."""
+    brightness, kelvin = 200, 3500
+
+    async def turn_on(light: LukeRobertsLight) -> None:
+        start = time.monotonic()
+        try:
+            await light.async_turn_on(brightness=brightness, color_temp_kelvin=kelvin)
+        except Exception:  # noqa: BLE001
+            return
+        result.latencies.append(time.monotonic() - start)
+
+    for lamp in bench.cloud.lamps.values():
+        lamp.on = False
+    for light in bench.lights:
+        light._attr_is_on = False  # noqa: SLF001
+
+    await asyncio.gather(*(turn_on(light) for light in bench.lights))
+    result.operations = len(bench.lights)
+    result.converged = sum(
+        lamp.on and lamp.brightness == ha_to_lamp_brightness(brightness) and lamp.kelvin == kelvin
+        for lamp in bench.cloud.lamps.values()
+    )
+
+
+async def run_group(bench: Bench, result: Result) -> None:
+    """Turn on one group light of all lamps with brightness and color temperature."""
+    brightness, kelvin = 200, 3500
+    group = LukeRobertsGroupLight(
+        bench.coordinator, bench.account, "Bench", FIRST_LAMP_ID, list(bench.cloud.lamps)
+    )
+    group.hass = bench.hass
+    group.entity_id = "light.bench_group"
+
+    for lamp in bench.cloud.lamps.values():
+        lamp.on = False
+    for light in bench.lights:
+        light._attr_is_on = False  # noqa: SLF001
+
+    start = time.monotonic()
+    try:
+        await group.async_turn_on(brightness=brightness, color_temp_kelvin=kelvin)
+    except Exception:  # noqa: BLE001
+        pass
+    else:
+        result.latencies.append(time.monotonic() - start)
+    result.operations = 1
+    result.converged = sum(
+        lamp.on and lamp.brightness == ha_to_lamp_brightness(brightness) and lamp.kelvin == kelvin
+        for lamp in bench.cloud.lamps.values()
+    )
+
+
+async def run_polling(bench: Bench, result: Result) -> None:
+    """Let the coordinator poll all lamps while nothing changes."""
+    coordinator = bench.coordinator
+    polls = 0
+
+    def on_update() -> None:
+        nonlocal polls
+        polls += 1
+        for light in bench.lights:
+            light._handle_coordinator_update()  # noqa: SLF001
+
+    remove = coordinator.async_add_listener(on_update)
+    start = time.monotonic()
+    await coordinator.async_refresh()
+    await asyncio.sleep(bench.args.poll_duration)
+    remove()
+
+    result.operations = polls
+    # Poll latency as seen by the cloud stand-in is not available, use the client metrics
+    for light in bench.lights:
+        stats = light._api.metrics.endpoints  # noqa: SLF001
+        for endpoint_stats in stats.values():
+            if endpoint_stats.last is not None:
+                result.latencies.append(endpoint_stats.last)
+    result.converged = sum(
+        lamp_id in (coordinator.data or {}) for lamp_id in bench.cloud.lamps
+    )
+    result.duration = time.monotonic() - start
+
+
+async def run_external(bench: Bench, result: Result) -> None:
+    """Change every lamp outside of Home Assistant and wait until the coordinator sees it."""
+    coordinator = bench.coordinator
+    brightness = 77
+    seen: dict[int, float] = {}
+
+    def on_update() -> None:
+        now = time.monotonic()
+        for lamp_id, state in (coordinator.data or {}).items():
+            if lamp_id not in seen and state.brightness == brightness:
+                seen[lamp_id] = now
+
+    remove = coordinator.async_add_listener(on_update)
+    # Schedules the regular polls, unless state is pushed
+    await coordinator.async_refresh()
+    changed = time.monotonic()
+    for lamp_id in bench.cloud.lamps:
+        bench.cloud.change_lamp(lamp_id, {"brightness": brightness})
+    deadline = changed + bench.args.poll_duration
+    while len(seen) < len(bench.cloud.lamps) and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+    remove()
+
+    result.operations = len(bench.cloud.lamps)
+    result.latencies = [at - changed for at in seen.values()]
+    result.converged = len(seen)
+
+
+RUNNERS = {
+    "slider": run_slider,
+    "mass_on": run_mass_on,
+    "group": run_group,
+    "polling": run_polling,
+    "external": run_external,
+}
+
+
+async def run_scenario(name: str, args: argparse.Namespace) -> Result:
+    """Run one workload on a fresh fake cloud and bench."""
+    profile = FaultProfile(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rates=dict(args.error_rate),
+        wake_delay=args.wake_delay,
+        listing_includes_state=args.listing_state,
+        push=args.push,
+    )
+    cloud = FakeCloud(
+        list(range(FIRST_LAMP_ID, FIRST_LAMP_ID + args.lamps)), profile, seed=args.seed
+    )
+    await cloud.start()
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        bench = Bench(hass, cloud, args)
+        try:
+            # Setup traffic is not part of the workload
+            cloud.profile.error_rates = {}
+            await bench.async_setup()
+            cloud.profile.error_rates = dict(args.error_rate)
+            cloud.reset_counters()
+            bench.state_writes = 0
+
+            result = Result(scenario=name, lamps=args.lamps)
+            start = time.monotonic()
+            await RUNNERS[name](bench, result)
+            if not result.duration:
+                result.duration = time.monotonic() - start
+            result.requests = Counter(cloud.requests)
+            result.injected = Counter(cloud.injected)
+            result.state_writes = bench.state_writes
+        finally:
+            await bench.async_close()
+            await cloud.stop()
+            await hass.async_stop(force=True)
+
+    return result
+
+
+def _error_rate(value: str) -> tuple[int, float]:
+    """Parse a STATUS=RATE argument."""
+    status, _, rate = value.partition("=")
+    return int(status), float(rate)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse the command line."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--lamps", type=int, default=10, help="number of lamps on the account")
+    parser.add_argument("--latency", type=float, default=0.05, help="cloud response latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.02, help="random extra latency in seconds")
+    parser.add_argument(
+        "--error-rate",
+        type=_error_rate,
+        action="append",
+        default=[],
+        metavar="STATUS=RATE",
+        help="inject HTTP errors, e.g. 429=0.05 or 500=0.01 (repeatable)",
+    )
+    parser.add_argument("--wake-delay", type=float, default=1.5, help="simulated BLE bridge connect time")
+    parser.add_argument("--client-wake-delay", type=float, default=BLE_WAKE_DELAY, help="client wake delay")
+    parser.add_argument("--confirm", action="store_true", help="confirm commands by state read-back")
+    parser.add_argument("--learn-wake-delay", action="store_true", help="tune the client wake delay per lamp")
+    parser.add_argument("--listing-state", action="store_true", help="embed lamp state in GET /lamps")
+    parser.add_argument("--push", action="store_true", help="offer the event stream at GET /lamps/events")
+    parser.add_argument("--slider-steps", type=int, default=20)
+    parser.add_argument("--slider-interval", type=float, default=0.05)
+    parser.add_argument("--poll-duration", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", metavar="FILE", help="also write the results as JSON")
+    return parser.parse_args(argv)
+
+
+def print_result(result: Result) -> None:
+    """Print a result as a short report."""
+    data = result.as_dict()
+
+    def ms(value: float | None) -> str:
+        return "-" if value is None else f"{value * 1000:.0f} ms"
+
+    print(f"== {data['scenario']} ({data['lamps']} lamps) ==")
+    print(f"  operations   {data['operations']} in {data['duration']} s ({data['throughput']} /s)")
+    print(f"  latency      p50 {ms(data['p50'])}  p99 {ms(data['p99'])}")
+    print(f"  requests     {data['requests']} ({data['requests'] / max(1, result.lamps):.1f} per lamp)")
+    for endpoint, count in sorted(data["requests_per_endpoint"].items()):
+        print(f"    {endpoint:<32} {count}")
+    if data["injected_errors"]:
+        print(f"  injected     {data['injected_errors']}")
+    print(f"  state writes {data['state_writes']}")
+    print(f"  converged    {data['converged']}")
+
+
+async def main(argv: list[str] | None = None) -> list[Result]:
+    """Run the selected workloads one after another."""
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.CRITICAL)
+    print(f"Home Assistant {HA_VERSION}")
+    results = []
+    for name in args.scenario:
+        result = await run_scenario(name, args)
+        print_result(result)
+        results.append(result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump([result.as_dict() for result in results], file, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
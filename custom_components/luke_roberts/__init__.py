@@ -1,19 +1,68 @@
 """The Luke Roberts integration."""
 from __future__ import annotations
 
+import asyncio
+from datetime import datetime
 import logging
 
+import voluptuous as vol
+
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
-from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
 
+from .account import async_acquire_account, async_get_account, async_release_account
 from .api import LukeRobertsApi
-from .const import CONF_API_TOKEN, CONF_DEVICE_NAME, CONF_LAMP_ID, DOMAIN
+from .coordinator import LukeRobertsCoordinator
+from .const import (
+    ATTR_DURATION,
+    ATTR_MEMORY,
+    CONF_API_TOKEN,
+    CONF_CONFIRM_COMMANDS,
+    CONF_DEVICE_NAME,
+    CONF_GROUP_MEMBERS,
+    CONF_KEEP_WARM,
+    CONF_LAMP_ID,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_STATE_CACHE_TTL,
+    DEFAULT_CONFIRM_COMMANDS,
+    DEFAULT_KEEP_WARM,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_STATE_CACHE_TTL,
+    DOMAIN,
+    PROFILE_DEFAULT_DURATION,
+    RECORD_DEFAULT_DURATION,
+    SERVICE_PROFILE,
+    SERVICE_RECORD,
+)
+from .profiler import Profiler
+from .recorder import TrafficRecorder
+from .wake import async_get_wake_delay_store
 
 _LOGGER = logging.getLogger(__name__)
 
-PLATFORMS: list[Platform] = [Platform.LIGHT]
+PLATFORMS: list[Platform] = [Platform.LIGHT, Platform.SENSOR]
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DURATION, default=PROFILE_DEFAULT_DURATION): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=600)
+        ),
+        vol.Optional(ATTR_MEMORY, default=False): cv.boolean,
+    }
+)
+
+RECORD_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DURATION, default=RECORD_DEFAULT_DURATION): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=3600)
+        ),
+    }
+)
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -21,34 +70,148 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     api_token = entry.data[CONF_API_TOKEN]
     lamp_id = entry.data[CONF_LAMP_ID]
 
-    api = LukeRobertsApi(api_token=api_token, lamp_id=lamp_id)
-
-    # Test connection
-    if not await api.test_connection():
+    # All lamps of one account share a pooled session and a coordinator
+    account = async_acquire_account(hass, api_token)
+    api = account.create_api(lamp_id)
+    try:
+        _apply_api_options(api, entry)
+        # The wake delay learned for this lamp carries over restarts and reloads
+        wake_delays = await async_get_wake_delay_store(hass)
+        api.set_wake_tuner(wake_delays.tuner(lamp_id))
+        coordinator = account.get_coordinator(hass)
+        _apply_poll_options(coordinator, entry)
+
+        # The connection is tested with the first refresh, lamps set up together share it
+        await coordinator.async_first_refresh_lamp(api)
+
+        # Store API instance
+        hass.data[DOMAIN][entry.entry_id] = api
+
+        # Apply changed options to the API client
+        entry.async_on_unload(entry.add_update_listener(_async_update_options))
+
+        # Forward the setup to the light and sensor platforms
+        await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    except Exception:
+        # Undo the setup so far, the account is not kept alive by a failed entry
+        hass.data[DOMAIN].pop(entry.entry_id, None)
+        account.remove_lamp(lamp_id)
         await api.close()
-        raise ConfigEntryNotReady(f"Unable to connect to Luke Roberts lamp {lamp_id}")
-
-    # Store API instance
-    hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN][entry.entry_id] = api
+        await async_release_account(hass, api_token)
+        raise
 
-    # Forward the setup to the light platform
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    _async_register_services(hass)
 
     return True
 
 
+def _async_register_services(hass: HomeAssistant) -> None:
+    """Register the services of the integration, once for all entries."""
+    if hass.services.has_service(DOMAIN, SERVICE_PROFILE):
+        return
+    profiler = Profiler(hass)
+
+    async def async_profile(call: ServiceCall) -> ServiceResponse:
+        """Profile the integration and return the path of the report."""
+        path = await profiler.async_profile(call.data[ATTR_DURATION], call.data[ATTR_MEMORY])
+        return {"path": path}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        async_profile,
+        schema=PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def async_record(call: ServiceCall) -> ServiceResponse:
+        """Record the cloud traffic of all lamps and return the path of the trace."""
+        path = await _async_record_traffic(hass, call.data[ATTR_DURATION])
+        return {"path": path}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_RECORD,
+        async_record,
+        schema=RECORD_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+async def _async_record_traffic(hass: HomeAssistant, duration: float) -> str:
+    """Record the traffic of all API clients for duration seconds into a trace file."""
+    apis = [api for api in hass.data[DOMAIN].values() if isinstance(api, LukeRobertsApi)]
+    if any(api.recorder is not None for api in apis):
+        raise HomeAssistantError("Traffic is already being recorded")
+
+    recorder = TrafficRecorder(secrets={api.api_token for api in apis})
+    _LOGGER.info("Recording Luke Roberts cloud traffic for %s seconds", duration)
+    for api in apis:
+        api.recorder = recorder
+    try:
+        await asyncio.sleep(duration)
+    finally:
+        for api in apis:
+            api.recorder = None
+
+    path = hass.config.path(f"{DOMAIN}_trace_{datetime.now():%Y%m%d_%H%M%S}.jsonl.gz")
+    await hass.async_add_executor_job(recorder.write, path)
+    _LOGGER.info("Trace of %s records written to %s", recorder.records, path)
+    return path
+
+
+async def _async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Handle options update."""
+    api: LukeRobertsApi = hass.data[DOMAIN][entry.entry_id]
+    account = async_get_account(hass, api.api_token)
+
+    # The group light is created with the light platform, rebuild it
+    members = [int(member) for member in entry.options.get(CONF_GROUP_MEMBERS, [])]
+    if members != account.groups.get(api.lamp_id, []):
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+
+    _apply_api_options(api, entry)
+    _apply_poll_options(account.get_coordinator(hass), entry)
+
+
+def _apply_api_options(api: LukeRobertsApi, entry: ConfigEntry) -> None:
+    """Pass the BLE bridge, command and state cache options of an entry to its API client."""
+    api.keep_warm = entry.options.get(CONF_KEEP_WARM, DEFAULT_KEEP_WARM)
+    api.confirm_commands = entry.options.get(CONF_CONFIRM_COMMANDS, DEFAULT_CONFIRM_COMMANDS)
+    api.state_cache_ttl = entry.options.get(CONF_STATE_CACHE_TTL, DEFAULT_STATE_CACHE_TTL)
+
+
+def _apply_poll_options(coordinator: LukeRobertsCoordinator, entry: ConfigEntry) -> None:
+    """Pass the poll interval limits of an entry to the account coordinator."""
+    coordinator.set_poll_intervals(
+        entry.data[CONF_LAMP_ID],
+        entry.options.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL),
+        entry.options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL),
+    )
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     # Unload platforms
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
     if unload_ok:
-        # Close API connection
-        api: LukeRobertsApi = hass.data[DOMAIN][entry.entry_id]
+        api: LukeRobertsApi = hass.data[DOMAIN].pop(entry.entry_id)
+
+        # Drop the account coordinator once its last lamp is gone
+        async_get_account(hass, api.api_token).remove_lamp(api.lamp_id)
+
+        # Stop the command queue, queued and buffered commands are dropped.
+        # The shared session is left open, it belongs to the account.
         await api.close()
 
-        # Remove entry from data
-        hass.data[DOMAIN].pop(entry.entry_id)
+        # The last entry of an account closes the shared session
+        await async_release_account(hass, api.api_token)
+
+        # The last entry removes the services of the integration
+        if not any(isinstance(item, LukeRobertsApi) for item in hass.data[DOMAIN].values()):
+            for service in (SERVICE_PROFILE, SERVICE_RECORD):
+                hass.services.async_remove(DOMAIN, service)
 
     return unload_ok
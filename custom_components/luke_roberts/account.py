@@ -0,0 +1,110 @@
+"""Per-account resources shared by all Luke Roberts config entries."""
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant, callback
+
+from .api import LukeRobertsApi, create_circuit_breaker, create_rate_limiter, create_session
+from .const import DATA_ACCOUNTS, DOMAIN
+from .coordinator import LukeRobertsCoordinator
+
+if TYPE_CHECKING:
+    from .light import LukeRobertsLight
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class LukeRobertsAccount:
+    """Resources shared by everything using the same API token.
+
+    This covers the pooled session, the request rate limiter, the circuit
+    breaker and the coordinator polling all lamps of the account.
+
+    Config entries, the config flow and the options flow acquire the account
+    while they need it and release it afterwards. The pooled session is
+    closed when the last user releases the account.
+    """
+
+    def __init__(self, api_token: str) -> None:
+        """Initialize the account."""
+        self.api_token = api_token
+        self.session: aiohttp.ClientSession = create_session()
+        self.rate_limiter = create_rate_limiter()
+        self.circuit_breaker = create_circuit_breaker()
+        self.coordinator: LukeRobertsCoordinator | None = None
+        # Light entities by lamp ID, for groups to command their members
+        self.lights: dict[int, LukeRobertsLight] = {}
+        # Group members by the lamp ID whose entry set up the group
+        self.groups: dict[int, list[int]] = {}
+        self._users = 0
+
+    @property
+    def in_use(self) -> bool:
+        """Return if any user still holds the account."""
+        return self._users > 0
+
+    def acquire(self) -> None:
+        """Register a user of the account."""
+        self._users += 1
+
+    def release(self) -> None:
+        """Unregister a user of the account."""
+        self._users -= 1
+
+    def create_api(self, lamp_id: int) -> LukeRobertsApi:
+        """Create an API client for a lamp of this account."""
+        return LukeRobertsApi(
+            api_token=self.api_token,
+            lamp_id=lamp_id,
+            session=self.session,
+            rate_limiter=self.rate_limiter,
+            circuit_breaker=self.circuit_breaker,
+        )
+
+    def get_coordinator(self, hass: HomeAssistant) -> LukeRobertsCoordinator:
+        """Return the coordinator of this account, creating it if needed."""
+        if self.coordinator is None:
+            self.coordinator = LukeRobertsCoordinator(hass, self.api_token)
+        return self.coordinator
+
+    def remove_lamp(self, lamp_id: int) -> None:
+        """Remove a lamp from the coordinator and drop it once empty."""
+        self.groups.pop(lamp_id, None)
+        if self.coordinator is not None and self.coordinator.remove_lamp(lamp_id):
+            self.coordinator = None
+
+
+@callback
+def async_acquire_account(hass: HomeAssistant, api_token: str) -> LukeRobertsAccount:
+    """Return the shared account for an API token and register a user."""
+    accounts: dict[str, LukeRobertsAccount] = hass.data.setdefault(DOMAIN, {}).setdefault(
+        DATA_ACCOUNTS, {}
+    )
+    account = accounts.get(api_token)
+    if account is None or account.session.closed:
+        account = accounts[api_token] = LukeRobertsAccount(api_token)
+    account.acquire()
+    return account
+
+
+@callback
+def async_get_account(hass: HomeAssistant, api_token: str) -> LukeRobertsAccount:
+    """Return the shared account for an API token that is already in use."""
+    return hass.data[DOMAIN][DATA_ACCOUNTS][api_token]
+
+
+async def async_release_account(hass: HomeAssistant, api_token: str) -> None:
+    """Unregister a user of an account and close it once unused."""
+    accounts: dict[str, LukeRobertsAccount] = hass.data[DOMAIN][DATA_ACCOUNTS]
+    account = accounts[api_token]
+    account.release()
+    if account.in_use:
+        return
+
+    accounts.pop(api_token)
+    _LOGGER.debug("Closing shared session for Luke Roberts account")
+    await account.session.close()
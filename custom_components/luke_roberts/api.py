@@ -1,22 +1,62 @@
 """API client for Luke Roberts Cloud API."""
+from __future__ import annotations
+
 import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable
+from email.utils import parsedate_to_datetime
 import logging
-from typing import Any
+import random
+import time
+from typing import TYPE_CHECKING, Any
 
 import aiohttp
 
 from .const import (
     API_BASE_URL,
+    API_CONNECTION_LIMIT,
+    API_DNS_CACHE_TTL,
+    API_KEEPALIVE_TIMEOUT,
+    API_RATE_BURST,
+    API_RATE_LIMIT,
+    API_RETRY_ATTEMPTS,
+    API_RETRY_BACKOFF,
     API_TIMEOUT,
+    BLE_WAKE_DELAY,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_TIMEOUT,
+    CONFIRM_POLL_INTERVAL,
+    CONFIRM_SENDS,
+    CONFIRM_TIMEOUT,
+    DEFAULT_KEEP_WARM,
+    DEFAULT_STATE_CACHE_TTL,
     ENDPOINT_LAMP_COMMAND,
+    ENDPOINT_LAMP_EVENTS,
     ENDPOINT_LAMP_STATE,
     ENDPOINT_LAMPS,
+    PUSH_HEARTBEAT_TIMEOUT,
     STATE_OFF,
     STATE_ON,
 )
+from .circuit_breaker import CircuitBreaker
+from .metrics import OUTCOME_ERROR, OUTCOME_OK, OUTCOME_TIMEOUT, ApiMetrics
+from .models import LampState, decode_json
+from .ratelimit import PRIORITY_HIGH, PRIORITY_LOW, RateLimiter
+from .recorder import TrafficRecorder
+
+if TYPE_CHECKING:
+    from .wake import WakeDelayTuner
 
 _LOGGER = logging.getLogger(__name__)
 
+# HTTP methods that are safe to resend after an unclear outcome
+IDEMPOTENT_METHODS = frozenset({"GET", "PUT"})
+
+# Bytes of a response body included in debug logs
+LOG_BODY_LIMIT = 200
+
+# Result of a command held back while the lamp is offline
+BUFFERED_RESULT: dict[str, Any] = {"buffered": True}
+
 
 class LukeRobertsApiError(Exception):
     """Base exception for Luke Roberts API errors."""
@@ -30,14 +70,506 @@ class LukeRobertsConnectionError(LukeRobertsApiError):
     """Connection error."""
 
 
+class LukeRobertsTimeoutError(LukeRobertsConnectionError):
+    """Request timeout."""
+
+
+class LukeRobertsServerError(LukeRobertsConnectionError):
+    """Server error (HTTP 5xx)."""
+
+
+class LukeRobertsCircuitOpenError(LukeRobertsConnectionError):
+    """Request rejected without sending because the cloud keeps failing."""
+
+
+class LukeRobertsNotConfirmedError(LukeRobertsApiError):
+    """Command did not show up in the lamp state."""
+
+
+class LukeRobertsPushUnsupportedError(LukeRobertsApiError):
+    """The cloud does not offer an event stream."""
+
+
+class LukeRobertsRateLimitError(LukeRobertsConnectionError):
+    """Too many requests (HTTP 429)."""
+
+    def __init__(self, retry_after: float) -> None:
+        """Initialize the error with the Retry-After time in seconds."""
+        super().__init__(f"Rate limited, retry after {retry_after:.1f} seconds")
+        self.retry_after = retry_after
+
+
+def _parse_retry_after(value: str | None, default: float = 1.0) -> float:
+    """Parse a Retry-After header given in seconds or as an HTTP date."""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+def _parse_event_line(line: bytes) -> dict[str, Any] | None:
+    """Return the event of a line of the event stream, or None for other lines.
+
+    Accepts server-sent event "data:" lines and plain JSON lines. Blank
+    lines, comments (heartbeats) and malformed data are skipped.
+    """
+    line = line.strip()
+    if line.startswith(b"data:"):
+        line = line[5:].strip()
+    if not line.startswith(b"{"):
+        return None
+    try:
+        event = decode_json(line)
+    except ValueError:
+        _LOGGER.debug("Skipping malformed event: %s", line[:200])
+        return None
+    return event if isinstance(event, dict) else None
+
+
+def command_kind(command: dict[str, Any]) -> str:
+    """Return the kind of a command, e.g. "brightness" for {"brightness": 50}.
+
+    Commands of the same kind overwrite each other on the lamp, so only the
+    newest one of each kind needs to be sent.
+    """
+    return "+".join(sorted(command))
+
+
+def command_applied(command: dict[str, Any], state: LampState | dict[str, Any] | str) -> bool | None:
+    """Return if a lamp state shows that a command was applied.
+
+    Returns None for commands the state cannot confirm, e.g. colors, which
+    the cloud does not report.
+    """
+    if not isinstance(state, LampState):
+        return None
+    if command.keys() == {"power"}:
+        return state.on is (command["power"] == STATE_ON)
+    if command.keys() == {"brightness"}:
+        return state.on is True and state.brightness == command["brightness"]
+    if command.keys() == {"kelvin"}:
+        return state.kelvin == command["kelvin"]
+    if command.keys() == {"scene"}:
+        # The state does not name the scene, only whether it switched the lamp on
+        return state.on is (command["scene"] != 0)
+    return None
+
+
+def compact_commands(commands: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Return the fewest commands that reach the state a sequence of commands sets.
+
+    commands hold at most one command per kind, in the order they were
+    issued. If the lamp ends up off, only the power off is needed.
+    Brightness and kelvin issued before the last scene are overridden by it.
+    """
+    last_switch = None
+    for command in commands:
+        if command.keys() in ({"power"}, {"scene"}):
+            last_switch = command
+    if last_switch is not None and (
+        last_switch.get("power") == STATE_OFF or last_switch.get("scene") == 0
+    ):
+        return [{"power": STATE_OFF}]
+
+    compacted: list[dict[str, Any]] = []
+    for command in commands:
+        if command.keys() == {"scene"} and command is last_switch:
+            compacted = [item for item in compacted if item.keys() not in ({"brightness"}, {"kelvin"})]
+        compacted.append(command)
+    return compacted
+
+
+class _PendingCommand:
+    """A queued command and the callers waiting for its outcome."""
+
+    __slots__ = ("command", "futures", "queued_at", "sends", "confirm_by", "wake_gap")
+
+    def __init__(self, command: dict[str, Any], future: asyncio.Future) -> None:
+        """Initialize the pending command."""
+        self.command = command
+        self.futures: list[asyncio.Future] = [future]
+        self.queued_at = time.monotonic()
+        # Confirmation mode: sends so far and when to give up waiting for the last one
+        self.sends = 0
+        self.confirm_by = 0.0
+        # Seconds after a wake-up the last send went out, if it was the first one after it
+        self.wake_gap: float | None = None
+
+    def supersede(self, newer: _PendingCommand) -> _PendingCommand:
+        """Hand the waiting callers over to a newer command of the same kind."""
+        newer.futures[:0] = self.futures
+        return newer
+
+    def set_result(self, result: dict[str, Any] | str | LampState) -> None:
+        """Resolve all waiting callers with the result."""
+        for future in self.futures:
+            if not future.done():
+                future.set_result(result)
+
+    def set_exception(self, err: BaseException) -> None:
+        """Fail all waiting callers with the error."""
+        for future in self.futures:
+            if not future.done():
+                future.set_exception(err)
+
+
+class CommandScheduler:
+    """Send the commands of one lamp one at a time, latest value wins.
+
+    Each command goes through send_command_reliable: a wake-up send unless
+    the BLE bridge is still warm, then the actual send. While a command
+    waits for the BLE bridge, newer commands of the same kind
+    replace it, so its final send carries the newest value. Commands queued
+    behind it are collapsed per kind the same way. Callers whose command was
+    superseded receive the outcome of the command that replaced it.
+
+    With confirm_commands enabled on the API client, a command is sent once
+    and the lamp state is read back until it shows the command. Only then
+    is it sent again. Callers receive the confirmed lamp state.
+
+    While the lamp is offline, commands are not sent. The newest one of
+    each kind is buffered and callers receive BUFFERED_RESULT right away.
+    Once the lamp is back, the buffered commands are compacted and replayed.
+    """
+
+    def __init__(self, api: LukeRobertsApi) -> None:
+        """Initialize the scheduler."""
+        self._api = api
+        # Pending commands by kind, in the order they have to be sent
+        self._pending: dict[str, _PendingCommand] = {}
+        # Desired state of an offline lamp as commands by kind, in the order they were issued
+        self._buffered: dict[str, dict[str, Any]] = {}
+        self._worker: asyncio.Task | None = None
+
+    @property
+    def busy(self) -> bool:
+        """Return if commands are queued or being sent."""
+        return bool(self._pending) or (self._worker is not None and not self._worker.done())
+
+    @property
+    def buffered(self) -> list[dict[str, Any]]:
+        """Return the commands buffered for an offline lamp."""
+        return list(self._buffered.values())
+
+    def _buffer(self, commands: list[dict[str, Any]]) -> list[dict[str, Any] | str | LampState]:
+        """Record commands as the desired state of the offline lamp."""
+        for command in commands:
+            kind = command_kind(command)
+            self._buffered.pop(kind, None)
+            self._buffered[kind] = command
+        _LOGGER.debug("Lamp %s is offline, buffered %s", self._api.lamp_id, commands)
+        return [BUFFERED_RESULT] * len(commands)
+
+    def replay(self) -> None:
+        """Send the buffered desired state once the lamp is back online.
+
+        Replay listeners of the API client learn about each buffered command
+        once it was sent, or failed or was made unnecessary by compaction.
+        """
+        if not self._buffered:
+            return
+        buffered = list(self._buffered.values())
+        commands = compact_commands(buffered)
+        self._buffered.clear()
+        _LOGGER.info("Lamp %s is back online, replaying %s", self._api.lamp_id, commands)
+        for command in buffered:
+            if command not in commands:
+                self._api.notify_replayed(command, False)
+        for command in commands:
+            future = self._enqueue(command)
+            future.add_done_callback(
+                lambda fut, command=command: self._api.notify_replayed(
+                    command, not fut.cancelled() and fut.exception() is None
+                )
+            )
+        self._ensure_worker()
+
+    async def submit(self, command: dict[str, Any]) -> dict[str, Any] | str | LampState:
+        """Queue a command and wait until it or a newer one was sent."""
+        if not self._api.online:
+            return self._buffer([command])[0]
+        future = self._enqueue(command)
+        self._ensure_worker()
+        return await asyncio.shield(future)
+
+    async def submit_batch(self, commands: list[dict[str, Any]]) -> list[dict[str, Any] | str | LampState]:
+        """Queue several commands at once and wait until all were sent.
+
+        The commands are queued before the worker picks any of them up, so
+        the whole batch shares a single bridge wake-up and is sent back to back.
+        """
+        if not self._api.online:
+            return self._buffer(commands)
+        futures = [self._enqueue(command) for command in commands]
+        self._ensure_worker()
+        return list(await asyncio.gather(*(asyncio.shield(future) for future in futures)))
+
+    def resend(self, command: dict[str, Any]) -> None:
+        """Queue a command again that did not reach the lamp, without waiting for it."""
+        self._enqueue(command)
+        self._ensure_worker()
+
+    def _enqueue(self, command: dict[str, Any]) -> asyncio.Future:
+        """Queue a command and return the future of its outcome."""
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        # Callers that stop waiting must not leave an unretrieved exception behind
+        future.add_done_callback(lambda fut: fut.cancelled() or fut.exception())
+
+        kind = command_kind(command)
+        pending = _PendingCommand(command, future)
+        previous = self._pending.pop(kind, None)
+        self._pending[kind] = previous.supersede(pending) if previous else pending
+        return future
+
+    def _ensure_worker(self) -> None:
+        """Start the worker unless it is already running."""
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._async_run())
+
+    async def _async_run(self) -> None:
+        """Send pending commands until the queue is empty."""
+        if self._api.confirm_commands:
+            await self._async_run_confirmed()
+            return
+
+        while self._pending:
+            kind = next(iter(self._pending))
+            pending = self._pending.pop(kind)
+            try:
+                # Make sure the BLE bridge is connected
+                await self._api.async_wake_bridge(pending.command)
+
+                # A newer command of the same kind supersedes this one
+                newer = self._pending.pop(kind, None)
+                if newer is not None:
+                    _LOGGER.debug(
+                        "Lamp %s: %s superseded by %s",
+                        self._api.lamp_id,
+                        pending.command,
+                        newer.command,
+                    )
+                    pending = pending.supersede(newer)
+
+                # Second send - actual command
+                result = await self._api.async_send_on_warm_bridge(pending.command)
+            except asyncio.CancelledError:
+                pending.set_exception(LukeRobertsConnectionError("Command cancelled"))
+                raise
+            except Exception as err:  # noqa: BLE001
+                self._fail(pending, err)
+            else:
+                self._succeed(pending, result)
+
+    async def _async_run_confirmed(self) -> None:
+        """Send pending commands once and confirm them by reading back the lamp state.
+
+        All queued commands are sent before the state is read, so one read
+        confirms a whole batch. Commands the state does not show in time are
+        queued again, up to CONFIRM_SENDS sends. A send that only woke the
+        BLE bridge is given a single read once the bridge is ready.
+        """
+        api = self._api
+        unconfirmed: dict[str, _PendingCommand] = {}
+        try:
+            while self._pending or unconfirmed:
+                while self._pending and not api.bridge_ready_in:
+                    kind = next(iter(self._pending))
+                    pending = self._pending.pop(kind)
+                    previous = unconfirmed.pop(kind, None)
+                    if previous is not None:
+                        _LOGGER.debug(
+                            "Lamp %s: %s superseded by %s", api.lamp_id, previous.command, pending.command
+                        )
+                        pending = previous.supersede(pending)
+                    await self._async_send_once(kind, pending, unconfirmed)
+                if not self._pending and not unconfirmed:
+                    break
+
+                # Wait for a waking bridge before sending more or reading back
+                await asyncio.sleep(max(CONFIRM_POLL_INTERVAL, api.bridge_ready_in))
+                if self._pending or not unconfirmed:
+                    continue
+
+                try:
+                    # Each read has to be newer than the last one
+                    state = await api.get_state(PRIORITY_HIGH, cached=False)
+                except Exception as err:  # noqa: BLE001
+                    for pending in unconfirmed.values():
+                        self._fail(pending, err)
+                    unconfirmed.clear()
+                    continue
+
+                now = time.monotonic()
+                for kind, pending in list(unconfirmed.items()):
+                    if command_applied(pending.command, state):
+                        _LOGGER.debug("Lamp %s: %s confirmed", api.lamp_id, pending.command)
+                        del unconfirmed[kind]
+                        if pending.wake_gap is not None:
+                            api.note_wake_outcome(pending.wake_gap, True)
+                        self._succeed(pending, state)
+                    elif now >= pending.confirm_by:
+                        del unconfirmed[kind]
+                        if pending.wake_gap is not None and state.reachable:
+                            api.note_wake_outcome(pending.wake_gap, False)
+                        if pending.sends < CONFIRM_SENDS:
+                            _LOGGER.debug("Lamp %s: %s not applied, resending", api.lamp_id, pending.command)
+                            self._pending[kind] = pending
+                        else:
+                            self._fail(
+                                pending,
+                                LukeRobertsNotConfirmedError(
+                                    f"Lamp {api.lamp_id} did not apply {pending.command}"
+                                ),
+                            )
+        except asyncio.CancelledError:
+            err = LukeRobertsConnectionError("Command cancelled")
+            for pending in unconfirmed.values():
+                pending.set_exception(err)
+            raise
+
+    async def _async_send_once(
+        self, kind: str, pending: _PendingCommand, unconfirmed: dict[str, _PendingCommand]
+    ) -> None:
+        """Send a command in confirmation mode and add it to the unconfirmed ones."""
+        api = self._api
+        try:
+            if command_applied(pending.command, LampState()) is None:
+                # The state cannot confirm this command, fall back to sending it twice
+                await api.async_wake_bridge(pending.command)
+                self._succeed(pending, await api.async_send_on_warm_bridge(pending.command))
+                return
+            await api.send_command(pending.command)
+        except asyncio.CancelledError:
+            pending.set_exception(LukeRobertsConnectionError("Command cancelled"))
+            raise
+        except Exception as err:  # noqa: BLE001
+            self._fail(pending, err)
+            return
+
+        pending.sends += 1
+        pending.wake_gap = api.last_wake_gap
+        # A wake-up send gets one read once the bridge is ready, others get CONFIRM_TIMEOUT
+        woke = api.bridge_ready_in > 0
+        pending.confirm_by = time.monotonic() + (api.bridge_ready_in if woke else CONFIRM_TIMEOUT)
+        unconfirmed[kind] = pending
+
+    def _succeed(self, pending: _PendingCommand, result: dict[str, Any] | str | LampState) -> None:
+        """Resolve a command and record its latency."""
+        self._api.metrics.record_command(time.monotonic() - pending.queued_at)
+        pending.set_result(result)
+
+    def _fail(self, pending: _PendingCommand, err: BaseException) -> None:
+        """Fail a command and record its latency."""
+        self._api.metrics.record_command(time.monotonic() - pending.queued_at, OUTCOME_ERROR)
+        pending.set_exception(err)
+
+    def cancel(self) -> None:
+        """Cancel the running sequence and drop all pending commands."""
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        err = LukeRobertsConnectionError("Command cancelled")
+        for pending in self._pending.values():
+            pending.set_exception(err)
+        self._pending.clear()
+        self._buffered.clear()
+
+
+def create_rate_limiter() -> RateLimiter:
+    """Create the request rate limiter of an account."""
+    return RateLimiter(rate=API_RATE_LIMIT, burst=API_RATE_BURST)
+
+
+def create_circuit_breaker() -> CircuitBreaker:
+    """Create the circuit breaker of an account."""
+    return CircuitBreaker(
+        failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout=CIRCUIT_RESET_TIMEOUT,
+    )
+
+
+def create_session() -> aiohttp.ClientSession:
+    """Create a pooled session for the Luke Roberts Cloud API.
+
+    Connections are kept alive and DNS lookups are cached, so consecutive
+    requests to the cloud skip the TCP/TLS handshake and name resolution.
+    """
+    connector = aiohttp.TCPConnector(
+        limit_per_host=API_CONNECTION_LIMIT,
+        ttl_dns_cache=API_DNS_CACHE_TTL,
+        keepalive_timeout=API_KEEPALIVE_TIMEOUT,
+    )
+    return aiohttp.ClientSession(connector=connector)
+
+
 class LukeRobertsApi:
     """API client for Luke Roberts Cloud API."""
 
-    def __init__(self, api_token: str, lamp_id: int) -> None:
-        """Initialize the API client."""
+    def __init__(
+        self,
+        api_token: str,
+        lamp_id: int,
+        session: aiohttp.ClientSession | None = None,
+        keep_warm: float = DEFAULT_KEEP_WARM,
+        base_url: str = API_BASE_URL,
+        rate_limiter: RateLimiter | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+    ) -> None:
+        """Initialize the API client.
+
+        If a session is passed, it is shared with other clients and is not
+        closed by this client. Clients of the same account should also share
+        one rate limiter and circuit breaker. keep_warm is the time in seconds
+        the BLE bridge is assumed to stay connected after a command. base_url
+        can point the client to a local stand-in of the cloud.
+        """
         self.api_token = api_token
         self.lamp_id = lamp_id
-        self._session: aiohttp.ClientSession | None = None
+        self.keep_warm = keep_warm
+        # Confirm queued commands by reading back the state instead of sending twice
+        self.confirm_commands = False
+        # Seconds the BLE bridge needs after a wake-up send
+        self.wake_delay = BLE_WAKE_DELAY
+        # Learns wake_delay from read-backs after wake-ups, if set
+        self.wake_tuner: WakeDelayTuner | None = None
+        # Seconds after the wake-up send the last send went out, if it was the first one after it
+        self.last_wake_gap: float | None = None
+        # Whether the lamp was reachable in its last known state
+        self.online = True
+        # Seconds a read state is reused by later reads, 0 to only merge concurrent reads
+        self.state_cache_ttl = DEFAULT_STATE_CACHE_TTL
+        # Set while the traffic of this client is recorded
+        self.recorder: TrafficRecorder | None = None
+        self._base_url = base_url
+        self._rate_limiter = rate_limiter or create_rate_limiter()
+        self._circuit_breaker = circuit_breaker or create_circuit_breaker()
+        self.metrics = ApiMetrics()
+        self._session = session
+        self._owns_session = session is None
+        # Monotonic times until which the BLE bridge is connected, and from
+        # which it is ready to forward commands after a wake-up send
+        self._bridge_warm_until = 0.0
+        self._bridge_ready_at = 0.0
+        # Monotonic time of the last wake-up send, and if no send followed it yet
+        self._woke_at = 0.0
+        self._first_send_after_wake = False
+        # Monotonic time of the last send per command kind
+        self._last_sent: dict[str, float] = {}
+        self._wake_check: asyncio.Task | None = None
+        # Last read state and the monotonic time it expires, reads in flight per priority
+        self._state_cache: tuple[float, LampState] | None = None
+        self._state_reads: dict[int, tuple[int, asyncio.Task[LampState]]] = {}
+        # Bumped by every command, so reads started before it are not reused after it
+        self._state_generation = 0
+        # Called with each buffered command once its replay was sent or failed
+        self._replay_listeners: list[Callable[[dict[str, Any], bool], None]] = []
+        self._scheduler = CommandScheduler(self)
         self._headers = {
             "Authorization": f"Bearer {api_token}",
             "Content-Type": "application/json",
@@ -46,12 +578,14 @@ class LukeRobertsApi:
     def _get_url(self, endpoint: str) -> str:
         """Build the API URL."""
         endpoint = endpoint.replace("{lamp_id}", str(self.lamp_id))
-        return f"{API_BASE_URL}{endpoint}"
+        return f"{self._base_url}{endpoint}"
 
     async def _ensure_session(self) -> aiohttp.ClientSession:
         """Ensure we have an active session."""
         if self._session is None or self._session.closed:
-            self._session = aiohttp.ClientSession()
+            if not self._owns_session:
+                raise LukeRobertsConnectionError("Shared session is closed")
+            self._session = create_session()
         return self._session
 
     async def _request(
@@ -59,8 +593,98 @@ class LukeRobertsApi:
         method: str,
         endpoint: str,
         json_data: dict[str, Any] | None = None,
+        priority: int = PRIORITY_LOW,
+        acquired: bool = False,
+    ) -> dict[str, Any] | str:
+        """Send a request to the Luke Roberts Cloud API.
+
+        The request waits for the account rate limiter in the lane of its
+        priority, unless the caller already acquired a token. A 429 response
+        pauses the whole account for its Retry-After time and the request is
+        retried once.
+
+        Idempotent requests are also retried with jittered exponential backoff
+        after timeouts, connection and server errors. Commands count as
+        idempotent since they set absolute values. While the account circuit
+        breaker is open, requests fail fast.
+        """
+        retries = API_RETRY_ATTEMPTS if method in IDEMPOTENT_METHODS else 0
+        rate_limit_retries = 1
+        attempt = 0
+        while True:
+            if not self._circuit_breaker.allow_request():
+                raise LukeRobertsCircuitOpenError("Luke Roberts Cloud API unavailable, failing fast")
+            if not acquired:
+                try:
+                    await self._rate_limiter.acquire(priority)
+                except asyncio.CancelledError:
+                    self._circuit_breaker.record(None)
+                    raise
+            acquired = False
+
+            try:
+                return await self._timed_request(method, endpoint, json_data)
+            except LukeRobertsRateLimitError as err:
+                self._rate_limiter.block(err.retry_after)
+                if not rate_limit_retries:
+                    raise
+                rate_limit_retries -= 1
+            except LukeRobertsConnectionError as err:
+                if attempt >= retries:
+                    raise
+                attempt += 1
+                # Full jitter keeps retries of many lamps from hitting the cloud in lockstep
+                backoff = random.uniform(0, API_RETRY_BACKOFF * 2**attempt)
+                _LOGGER.debug(
+                    "Retrying %s %s in %.2f seconds after: %s", method, endpoint, backoff, err
+                )
+                await asyncio.sleep(backoff)
+
+    async def _timed_request(
+        self,
+        method: str,
+        endpoint: str,
+        json_data: dict[str, Any] | None = None,
     ) -> dict[str, Any] | str:
-        """Send a request to the Luke Roberts Cloud API."""
+        """Send a single request, record its latency and report it to the circuit breaker."""
+        start = time.monotonic()
+        outcome = OUTCOME_ERROR
+        # Whether the cloud answered properly, None if the request was aborted
+        healthy: bool | None = None
+        try:
+            result = await self._send_request(method, endpoint, json_data)
+        except LukeRobertsRateLimitError:
+            healthy = True
+            raise
+        except LukeRobertsTimeoutError:
+            outcome = OUTCOME_TIMEOUT
+            healthy = False
+            raise
+        except LukeRobertsConnectionError:
+            healthy = False
+            raise
+        except LukeRobertsApiError:
+            healthy = True
+            raise
+        else:
+            outcome = OUTCOME_OK
+            healthy = True
+            return result
+        finally:
+            self.metrics.record_request(endpoint, time.monotonic() - start, outcome)
+            self._circuit_breaker.record(healthy)
+
+    async def _send_request(
+        self,
+        method: str,
+        endpoint: str,
+        json_data: dict[str, Any] | None = None,
+    ) -> dict[str, Any] | str:
+        """Send a request to the Luke Roberts Cloud API.
+
+        The body is read once as bytes and decoded in a single pass. It is
+        only logged, shortened, while debug logging is enabled.
+        """
         session = await self._ensure_session()
         url = self._get_url(endpoint)
 
@@ -71,6 +695,7 @@ class LukeRobertsApi:
             json_data if json_data else "None",
         )
 
+        start = time.monotonic()
         try:
             async with asyncio.timeout(API_TIMEOUT):
                 async with session.request(
@@ -79,43 +704,129 @@ class LukeRobertsApi:
                     headers=self._headers,
                     json=json_data,
                 ) as response:
-                    response_text = await response.text()
-                    _LOGGER.debug(
-                        "API Response [%s]: %s", response.status, response_text
-                    )
+                    body = await response.read()
+                    if _LOGGER.isEnabledFor(logging.DEBUG):
+                        _LOGGER.debug(
+                            "API Response [%s]: %s", response.status, body[:LOG_BODY_LIMIT]
+                        )
+                    if self.recorder is not None:
+                        self.recorder.record_request(
+                            self.lamp_id, method, endpoint, json_data, response.status, body, start
+                        )
 
                     if response.status == 401:
                         raise LukeRobertsAuthError("Invalid API token")
                     if response.status == 404:
                         raise LukeRobertsApiError(f"Lamp {self.lamp_id} not found")
-
-                    response.raise_for_status()
+                    if response.status == 429:
+                        raise LukeRobertsRateLimitError(
+                            _parse_retry_after(response.headers.get("Retry-After"))
+                        )
+                    if response.status >= 500:
+                        raise LukeRobertsServerError(f"Server error: HTTP {response.status}")
+                    if response.status >= 400:
+                        raise LukeRobertsApiError(f"Request rejected: HTTP {response.status}")
 
                     # HTTP 204 No Content - command accepted, no response body
                     if response.status == 204:
                         return {"success": True}
 
                     # Try to parse JSON response
-                    if response_text:
+                    if body:
                         try:
-                            return await response.json()
-                        except Exception:  # noqa: BLE001
+                            return decode_json(body)
+                        except ValueError:
                             # Some endpoints return plain text
-                            return response_text
+                            return body.decode(response.charset or "utf-8", errors="replace")
 
                     # Empty response
                     return {"success": True}
 
         except asyncio.TimeoutError as err:
             _LOGGER.error("Timeout connecting to Luke Roberts Cloud API")
-            raise LukeRobertsConnectionError("API request timeout") from err
+            if self.recorder is not None:
+                self.recorder.record_request(
+                    self.lamp_id, method, endpoint, json_data, "timeout", None, start
+                )
+            raise LukeRobertsTimeoutError("API request timeout") from err
         except aiohttp.ClientError as err:
             _LOGGER.error("Error connecting to Luke Roberts Cloud API: %s", err)
+            if self.recorder is not None:
+                self.recorder.record_request(
+                    self.lamp_id, method, endpoint, json_data, "error", None, start
+                )
+            raise LukeRobertsConnectionError(str(err)) from err
+
+    async def async_stream_events(
+        self, on_connected: Callable[[], None]
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield the state changes of all lamps of the account as they happen.
+
+        The event stream is read as server-sent events or newline-delimited
+        JSON. Each event has the shape of an entry of the /lamps listing.
+        on_connected is called once the cloud accepted the stream. The
+        iterator ends or raises LukeRobertsConnectionError when the stream
+        breaks or stays silent for PUSH_HEARTBEAT_TIMEOUT seconds.
+
+        Raises:
+            LukeRobertsPushUnsupportedError: If the cloud has no event stream
+        """
+        if not self._circuit_breaker.allow_request():
+            raise LukeRobertsCircuitOpenError("Luke Roberts Cloud API unavailable, failing fast")
+        try:
+            await self._rate_limiter.acquire(PRIORITY_LOW)
+        except asyncio.CancelledError:
+            self._circuit_breaker.record(None)
+            raise
+
+        session = await self._ensure_session()
+        timeout = aiohttp.ClientTimeout(connect=API_TIMEOUT, sock_read=PUSH_HEARTBEAT_TIMEOUT)
+        # Whether the cloud answered properly, None if aborted. Once the
+        # stream is open, its end says nothing about the health of the cloud.
+        healthy: bool | None = None
+        connected = False
+        try:
+            async with session.get(
+                self._get_url(ENDPOINT_LAMP_EVENTS),
+                headers={**self._headers, "Accept": "text/event-stream"},
+                timeout=timeout,
+            ) as response:
+                # 501 only says that there is no event stream
+                healthy = response.status < 500 or response.status == 501
+                if response.status == 401:
+                    raise LukeRobertsAuthError("Invalid API token")
+                if response.status in (404, 405, 406, 501):
+                    raise LukeRobertsPushUnsupportedError(
+                        f"Event stream not available: HTTP {response.status}"
+                    )
+                if response.status >= 400:
+                    raise LukeRobertsConnectionError(f"Event stream rejected: HTTP {response.status}")
+
+                connected = True
+                self._circuit_breaker.record(healthy)
+                on_connected()
+                async for line in response.content:
+                    event = _parse_event_line(line)
+                    if event is not None:
+                        yield event
+        except asyncio.TimeoutError as err:
+            healthy = False
+            raise LukeRobertsTimeoutError("Event stream timed out") from err
+        except aiohttp.ClientError as err:
+            healthy = False
             raise LukeRobertsConnectionError(str(err)) from err
+        finally:
+            if not connected:
+                self._circuit_breaker.record(healthy)
 
     async def close(self) -> None:
-        """Close the session."""
-        if self._session and not self._session.closed:
+        """Cancel queued commands and close the session if it is owned by this client."""
+        self._scheduler.cancel()
+        if self._wake_check is not None:
+            self._wake_check.cancel()
+            self._wake_check = None
+        self._state_cache = None
+        if self._owns_session and self._session and not self._session.closed:
             await self._session.close()
             self._session = None
 
@@ -126,17 +837,55 @@ class LukeRobertsApi:
             return result
         return []
 
-    async def get_state(self) -> dict[str, Any]:
+    async def get_state(self, priority: int = PRIORITY_LOW, cached: bool = True) -> LampState:
         """Get the current state of the lamp.
 
+        Concurrent calls share one request, and unless cached is False, a
+        state read within the last state_cache_ttl seconds is returned
+        without a request. Commands to the lamp invalidate both, so no
+        caller gets a state read before its own command was sent.
+
         Note: This endpoint is not documented in the official API docs.
         It may not be available or may return limited information.
         """
-        result = await self._request("GET", ENDPOINT_LAMP_STATE)
-        if isinstance(result, str):
-            # If the API returns a string, try to parse it or return as dict
-            return {"raw_state": result}
-        return result
+        entry = self._state_cache
+        if cached and entry is not None and time.monotonic() < entry[0]:
+            self.metrics.state_cache_hits += 1
+            return entry[1]
+
+        read = self._state_reads.get(priority)
+        if read is not None and read[0] == self._state_generation:
+            self.metrics.state_reads_joined += 1
+        else:
+            task = asyncio.get_running_loop().create_task(self._async_read_state(priority))
+            # Callers that stop waiting must not leave an unretrieved exception behind
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+            read = self._state_reads[priority] = (self._state_generation, task)
+        # One caller giving up must not cancel the read for the others
+        return await asyncio.shield(read[1])
+
+    async def _async_read_state(self, priority: int) -> LampState:
+        """Read the state of the lamp and cache it unless a command was sent meanwhile."""
+        generation = self._state_generation
+        try:
+            result = await self._request("GET", ENDPOINT_LAMP_STATE, priority=priority)
+        finally:
+            read = self._state_reads.get(priority)
+            if read is not None and read[1] is asyncio.current_task():
+                del self._state_reads[priority]
+        if not isinstance(result, dict):
+            # Unknown format, nothing to take over
+            _LOGGER.debug("Unexpected state of lamp %s: %.200s", self.lamp_id, result)
+            return LampState()
+        state = LampState.from_dict(result)
+        if self.state_cache_ttl > 0 and generation == self._state_generation:
+            self._state_cache = (time.monotonic() + self.state_cache_ttl, state)
+        return state
+
+    def _invalidate_state(self) -> None:
+        """Forget the cached state and stop sharing reads in flight."""
+        self._state_generation += 1
+        self._state_cache = None
 
     async def send_command(self, command: dict[str, Any]) -> dict[str, Any] | str:
         """Send a command to the lamp.
@@ -144,28 +893,258 @@ class LukeRobertsApi:
         Note: Commands are executed asynchronously. The API enqueues the command
         but does not indicate whether the lamp has received or executed it.
         """
-        return await self._request("PUT", ENDPOINT_LAMP_COMMAND, command)
+        return await self._async_put_command(command)
+
+    async def _async_put_command(
+        self, command: dict[str, Any], acquired: bool = False
+    ) -> dict[str, Any] | str:
+        """Send a command and note that it kept the BLE bridge warm."""
+        # Reads in flight while the command is sent may or may not show it
+        self._invalidate_state()
+        try:
+            result = await self._request(
+                "PUT", ENDPOINT_LAMP_COMMAND, command, priority=PRIORITY_HIGH, acquired=acquired
+            )
+        finally:
+            self._invalidate_state()
+        now = time.monotonic()
+        self._last_sent[command_kind(command)] = now
+        self.last_wake_gap = None
+        if not self.is_bridge_warm:
+            self._bridge_ready_at = now + self.wake_delay
+            self._woke_at = now
+            self._first_send_after_wake = True
+        elif self._first_send_after_wake:
+            self._first_send_after_wake = False
+            self.last_wake_gap = now - self._woke_at
+        self._bridge_warm_until = now + self.keep_warm
+        return result
+
+    def set_wake_tuner(self, tuner: WakeDelayTuner) -> None:
+        """Learn the wake delay with a tuner from now on, starting from its delay."""
+        self.wake_tuner = tuner
+        self.wake_delay = tuner.delay
 
-    async def send_command_reliable(self, command: dict[str, Any], delay: float = 2.0) -> dict[str, Any] | str:
+    def note_wake_outcome(self, gap: float, applied: bool) -> None:
+        """Note whether the first send gap seconds after a wake-up reached the lamp."""
+        if self.wake_tuner is None:
+            return
+        self.wake_tuner.record(gap, applied)
+        self.wake_delay = self.wake_tuner.delay
+
+    def _check_wake(self, command: dict[str, Any]) -> None:
+        """Read the state back after the first send on a woken bridge, to tune the wake delay.
+
+        Only while the tuner wants a sample and the state can show the command.
+        Confirmation mode reads the state back anyway and notes outcomes itself.
+        """
+        gap = self.last_wake_gap
+        if gap is None or self.wake_tuner is None or command_applied(command, LampState()) is None:
+            return
+        if self._wake_check is not None and not self._wake_check.done():
+            return
+        if not self.wake_tuner.wants_sample():
+            return
+        self._wake_check = asyncio.get_running_loop().create_task(
+            self._async_check_wake(command, gap, self._last_sent[command_kind(command)])
+        )
+
+    async def _async_check_wake(self, command: dict[str, Any], gap: float, sent_at: float) -> None:
+        """Read back whether a command reached the lamp and resend it if it did not."""
+        kind = command_kind(command)
+        await asyncio.sleep(CONFIRM_TIMEOUT)
+        # A newer command of the same kind makes the outcome meaningless
+        if self._last_sent.get(kind) != sent_at:
+            return
+        try:
+            state = await self.get_state()
+        except LukeRobertsApiError:
+            return
+        if self._last_sent.get(kind) != sent_at or not state.reachable:
+            return
+        applied = bool(command_applied(command, state))
+        self.note_wake_outcome(gap, applied)
+        if not applied:
+            _LOGGER.debug(
+                "Lamp %s: %s sent %.2f seconds after wake-up was lost, resending",
+                self.lamp_id,
+                command,
+                gap,
+            )
+            self._scheduler.resend(command)
+
+    def set_online(self, online: bool) -> None:
+        """Note whether the lamp state shows the lamp as reachable.
+
+        Commands to an offline lamp are buffered and replayed once it is back.
+        """
+        if online == self.online:
+            return
+        self.online = online
+        if online:
+            self._scheduler.replay()
+        else:
+            _LOGGER.debug("Lamp %s went offline, buffering commands", self.lamp_id)
+
+    @property
+    def buffered_commands(self) -> list[dict[str, Any]]:
+        """Return the commands buffered while the lamp is offline."""
+        return self._scheduler.buffered
+
+    def add_replay_listener(self, listener: Callable[[dict[str, Any], bool], None]) -> Callable[[], None]:
+        """Call listener(command, sent) once a buffered command was replayed, return a remover."""
+        self._replay_listeners.append(listener)
+        return lambda: self._replay_listeners.remove(listener)
+
+    def notify_replayed(self, command: dict[str, Any], sent: bool) -> None:
+        """Tell the replay listeners whether a buffered command was sent."""
+        for listener in list(self._replay_listeners):
+            listener(command, sent)
+
+    @property
+    def is_bridge_warm(self) -> bool:
+        """Return if the BLE bridge is assumed to still be connected."""
+        return time.monotonic() < self._bridge_warm_until
+
+    @property
+    def bridge_ready_in(self) -> float:
+        """Return the seconds until a waking BLE bridge forwards commands."""
+        return max(0.0, self._bridge_ready_at - time.monotonic())
+
+    async def async_wake_bridge(self, command: dict[str, Any], delay: float | None = None) -> None:
+        """Make sure the BLE bridge is connected before sending a command.
+
+        If the bridge is cold, the command is sent once to wake it up and we
+        wait for the delay (default: wake_delay). If it is warm, only the
+        remainder of a wake-up that is still in progress is awaited.
+        """
+        if delay is None:
+            delay = self.wake_delay
+        if self.is_bridge_warm:
+            remaining = self._bridge_ready_at - time.monotonic()
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+            return
+
+        await self.send_command(command)
+        self._bridge_ready_at = time.monotonic() + delay
+        await asyncio.sleep(delay)
+
+    async def async_send_on_warm_bridge(
+        self, command: dict[str, Any], delay: float | None = None
+    ) -> dict[str, Any] | str:
+        """Send a command after async_wake_bridge, while the bridge is connected.
+
+        Warmth is checked once the rate limiter granted the request. If the
+        wait let the bridge go cold, that send becomes the wake-up instead and
+        the command is sent again after the delay.
+        """
+        if delay is None:
+            delay = self.wake_delay
+        for _ in range(2):
+            await self._rate_limiter.acquire(PRIORITY_HIGH)
+            warm = self.is_bridge_warm
+            result = await self._async_put_command(command, acquired=True)
+            if warm:
+                self._check_wake(command)
+                return result
+            _LOGGER.debug("Bridge of lamp %s went cold while rate limited", self.lamp_id)
+            self._bridge_ready_at = time.monotonic() + delay
+            await asyncio.sleep(delay)
+        return await self.send_command(command)
+
+    async def prewarm(self) -> None:
+        """Wake the BLE bridge ahead of time without waiting for it.
+
+        The wake-up re-sends the power state just read from the cloud, so it
+        does not change the lamp, even if it was switched outside of Home
+        Assistant. Queued commands wake the bridge themselves, nothing is
+        sent while there are any. A command sent within the keep-warm window
+        then needs a single send.
+        """
+        if not self.online:
+            _LOGGER.debug("Lamp %s is offline, not prewarming", self.lamp_id)
+            return
+        if self.is_bridge_warm or self._scheduler.busy:
+            _LOGGER.debug("Bridge of lamp %s is already warm or waking up", self.lamp_id)
+            return
+        state = await self.get_state(PRIORITY_HIGH)
+        if state.on is None or self.is_bridge_warm or self._scheduler.busy:
+            return
+        await self.send_command({"power": STATE_ON if state.on else STATE_OFF})
+
+    async def send_command_reliable(
+        self, command: dict[str, Any], delay: float | None = None
+    ) -> dict[str, Any] | str:
         """Send a command reliably by sending it twice with a delay.
 
         The Luke Roberts Cloud API requires commands to be sent twice:
         1. First call establishes the Bluetooth connection via the smartphone bridge
         2. Second call (after delay) actually reaches the lamp
 
+        The first call is skipped while the bridge is still warm from a
+        previous command.
+
         Args:
             command: The command dictionary to send
-            delay: Delay in seconds between the two sends (default: 2.0)
+            delay: Delay in seconds between the two sends (default: wake_delay, 2.0)
 
         Returns:
             The result from the second (actual) command
         """
-        # First send - establishes BLE connection
-        await self._request("PUT", ENDPOINT_LAMP_COMMAND, command)
-        # Wait for BLE connection to establish
-        await asyncio.sleep(delay)
-        # Second send - actual command
-        return await self._request("PUT", ENDPOINT_LAMP_COMMAND, command)
+        start = time.monotonic()
+        try:
+            # First send - establishes BLE connection, unless still warm
+            await self.async_wake_bridge(command, delay)
+            # Second send - actual command
+            result = await self.async_send_on_warm_bridge(command, delay)
+        except LukeRobertsApiError:
+            self.metrics.record_command(time.monotonic() - start, OUTCOME_ERROR)
+            raise
+        self.metrics.record_command(time.monotonic() - start)
+        return result
+
+    async def queue_command(self, command: dict[str, Any]) -> dict[str, Any] | str | LampState:
+        """Send a command reliably through the per-lamp command queue.
+
+        Like send_command_reliable, but commands are serialized and newer
+        commands of the same kind supersede older ones that were not sent yet.
+
+        Returns:
+            The result of the command, or of the newer command that replaced it.
+            With confirm_commands, the lamp state that confirmed it.
+            BUFFERED_RESULT if the lamp is offline.
+
+        Raises:
+            LukeRobertsNotConfirmedError: With confirm_commands, if the lamp
+                state never showed the command
+        """
+        if self.recorder is None:
+            return await self._scheduler.submit(command)
+        return await self._recorded_submit([command], self._scheduler.submit(command))
+
+    async def _recorded_submit(self, commands: list[dict[str, Any]], submit: Awaitable[Any]) -> Any:
+        """Await a command submission and record it with its outcome."""
+        recorder = self.recorder
+        start = time.monotonic()
+        ok = False
+        try:
+            result = await submit
+            ok = True
+            return result
+        finally:
+            if recorder is not None:
+                recorder.record_commands(self.lamp_id, commands, start, ok)
+
+    async def queue_commands(self, commands: list[dict[str, Any]]) -> list[dict[str, Any] | str | LampState]:
+        """Send several single-parameter commands through the command queue.
+
+        The commands keep their order and are sent one by one, but the BLE
+        bridge is woken up only once for the whole batch.
+        """
+        if self.recorder is None:
+            return await self._scheduler.submit_batch(commands)
+        return await self._recorded_submit(commands, self._scheduler.submit_batch(commands))
 
     async def turn_on(self) -> dict[str, Any] | str:
         """Turn the lamp on."""
@@ -0,0 +1,77 @@
+"""Circuit breaker for the Luke Roberts Cloud API client."""
+from __future__ import annotations
+
+import logging
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Fail fast while the cloud is unreachable for an account.
+
+    After failure_threshold consecutive failed requests (timeouts, connection
+    and server errors) the circuit opens and requests are rejected without
+    touching the network. After reset_timeout seconds a single probe request
+    is let through. If it succeeds the circuit closes again, otherwise it
+    stays open for another reset_timeout.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        """Initialize the circuit breaker."""
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.state = STATE_CLOSED
+
+    def allow_request(self) -> bool:
+        """Return if a request may be sent now.
+
+        In the half-open state this hands out the single probe, so every
+        allowed request must be followed by a call to record().
+        """
+        if self.state == STATE_CLOSED:
+            return True
+        if self.state == STATE_OPEN:
+            if time.monotonic() - self._opened_at < self._reset_timeout:
+                return False
+            _LOGGER.debug("Circuit half-open, probing the Luke Roberts Cloud API")
+            self.state = STATE_HALF_OPEN
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def record(self, healthy: bool | None) -> None:
+        """Record the outcome of an allowed request.
+
+        healthy is None if the request was aborted before the cloud answered.
+        """
+        probe = self._probe_in_flight
+        self._probe_in_flight = False
+        if healthy is None:
+            return
+
+        if healthy:
+            if self.state != STATE_CLOSED:
+                _LOGGER.info("Luke Roberts Cloud API reachable again, closing circuit")
+            self.state = STATE_CLOSED
+            self._failures = 0
+            return
+
+        self._failures += 1
+        if probe or self._failures >= self._failure_threshold:
+            if self.state == STATE_CLOSED:
+                _LOGGER.warning(
+                    "Luke Roberts Cloud API failed %s times in a row, failing fast for %s seconds",
+                    self._failures,
+                    self._reset_timeout,
+                )
+            self.state = STATE_OPEN
+            self._opened_at = time.monotonic()
@@ -11,8 +11,28 @@ from homeassistant.core import HomeAssistant
 from homeassistant.data_entry_flow import FlowResult
 import homeassistant.helpers.config_validation as cv
 
-from .api import LukeRobertsApi, LukeRobertsAuthError, LukeRobertsApiError
-from .const import CONF_API_TOKEN, CONF_DEVICE_NAME, CONF_LAMP_ID, CONF_SCENE_NAMES, DOMAIN, MAX_SCENE, MIN_SCENE
+from .account import async_acquire_account, async_release_account
+from .api import LukeRobertsAuthError, LukeRobertsApiError
+from .const import (
+    CONF_API_TOKEN,
+    CONF_CONFIRM_COMMANDS,
+    CONF_DEVICE_NAME,
+    CONF_GROUP_MEMBERS,
+    CONF_KEEP_WARM,
+    CONF_LAMP_ID,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_SCENE_NAMES,
+    CONF_STATE_CACHE_TTL,
+    DEFAULT_CONFIRM_COMMANDS,
+    DEFAULT_KEEP_WARM,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_STATE_CACHE_TTL,
+    DOMAIN,
+    MAX_SCENE,
+    MIN_SCENE,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -27,10 +47,9 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
 
 async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
     """Validate the user input allows us to connect."""
-    api = LukeRobertsApi(
-        api_token=data[CONF_API_TOKEN],
-        lamp_id=data[CONF_LAMP_ID],
-    )
+    # Reuse the pooled session of the account if it is already set up
+    account = async_acquire_account(hass, data[CONF_API_TOKEN])
+    api = account.create_api(data[CONF_LAMP_ID])
 
     try:
         # Test connection and get lamp state
@@ -41,23 +60,20 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
         if not device_name:
             device_name = f"Luke Roberts Lamp {data[CONF_LAMP_ID]}"
 
-        await api.close()
-
         return {
             "title": device_name,
             "lamp_id": data[CONF_LAMP_ID],
         }
     except LukeRobertsAuthError:
-        await api.close()
         raise InvalidAuth
     except LukeRobertsApiError as err:
-        await api.close()
         _LOGGER.error("API error: %s", err)
         raise CannotConnect
     except Exception as err:
-        await api.close()
         _LOGGER.exception("Unexpected exception during validation")
         raise CannotConnect from err
+    finally:
+        await async_release_account(hass, data[CONF_API_TOKEN])
 
 
 class LukeRobertsConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -125,10 +141,21 @@ class LukeRobertsOptionsFlow(config_entries.OptionsFlow):
                     scene_num = key.replace("scene_", "")
                     scene_names[scene_num] = value.strip()
 
-            # Save the scene names
+            min_scan_interval = user_input.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL)
+            max_scan_interval = user_input.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL)
+
+            # Save the scene names, bridge and polling settings
             return self.async_create_entry(
                 title="",
-                data={CONF_SCENE_NAMES: scene_names}
+                data={
+                    CONF_SCENE_NAMES: scene_names,
+                    CONF_KEEP_WARM: user_input.get(CONF_KEEP_WARM, DEFAULT_KEEP_WARM),
+                    CONF_CONFIRM_COMMANDS: user_input.get(CONF_CONFIRM_COMMANDS, DEFAULT_CONFIRM_COMMANDS),
+                    CONF_STATE_CACHE_TTL: user_input.get(CONF_STATE_CACHE_TTL, DEFAULT_STATE_CACHE_TTL),
+                    CONF_MIN_SCAN_INTERVAL: min_scan_interval,
+                    CONF_MAX_SCAN_INTERVAL: max(min_scan_interval, max_scan_interval),
+                    CONF_GROUP_MEMBERS: user_input.get(CONF_GROUP_MEMBERS, []),
+                },
             )
 
         # Get current scene names or create defaults
@@ -151,6 +178,57 @@ class LukeRobertsOptionsFlow(config_entries.OptionsFlow):
                 vol.Optional("scene_3", default="Scene 3"): str,
             }
 
+        # BLE bridge settings
+        schema_dict[
+            vol.Optional(
+                CONF_KEEP_WARM,
+                default=self.config_entry.options.get(CONF_KEEP_WARM, DEFAULT_KEEP_WARM),
+            )
+        ] = vol.All(vol.Coerce(float), vol.Range(min=0, max=60))
+        schema_dict[
+            vol.Optional(
+                CONF_CONFIRM_COMMANDS,
+                default=self.config_entry.options.get(CONF_CONFIRM_COMMANDS, DEFAULT_CONFIRM_COMMANDS),
+            )
+        ] = bool
+        schema_dict[
+            vol.Optional(
+                CONF_STATE_CACHE_TTL,
+                default=self.config_entry.options.get(CONF_STATE_CACHE_TTL, DEFAULT_STATE_CACHE_TTL),
+            )
+        ] = vol.All(vol.Coerce(float), vol.Range(min=0, max=10))
+
+        # Adaptive polling limits
+        schema_dict[
+            vol.Optional(
+                CONF_MIN_SCAN_INTERVAL,
+                default=self.config_entry.options.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL),
+            )
+        ] = vol.All(vol.Coerce(int), vol.Range(min=1, max=60))
+        schema_dict[
+            vol.Optional(
+                CONF_MAX_SCAN_INTERVAL,
+                default=self.config_entry.options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL),
+            )
+        ] = vol.All(vol.Coerce(int), vol.Range(min=10, max=3600))
+
+        # Group light with other lamps of the same account
+        other_lamps = {
+            str(entry.data[CONF_LAMP_ID]): entry.title
+            for entry in self.hass.config_entries.async_entries(DOMAIN)
+            if entry.entry_id != self.config_entry.entry_id
+            and entry.data.get(CONF_API_TOKEN) == self.config_entry.data[CONF_API_TOKEN]
+        }
+        if other_lamps:
+            current_members = [
+                member
+                for member in self.config_entry.options.get(CONF_GROUP_MEMBERS, [])
+                if member in other_lamps
+            ]
+            schema_dict[
+                vol.Optional(CONF_GROUP_MEMBERS, default=current_members)
+            ] = cv.multi_select(other_lamps)
+
         return self.async_show_form(
             step_id="init",
             data_schema=vol.Schema(schema_dict),
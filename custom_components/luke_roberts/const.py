@@ -7,18 +7,118 @@ CONF_API_TOKEN = "api_token"
 CONF_LAMP_ID = "lamp_id"
 CONF_DEVICE_NAME = "device_name"
 CONF_SCENE_NAMES = "scene_names"  # Dict mapping scene number to custom name
+CONF_KEEP_WARM = "keep_warm"  # Seconds the BLE bridge stays connected after a command
+CONF_CONFIRM_COMMANDS = "confirm_commands"  # Confirm commands by reading back the lamp state
+CONF_STATE_CACHE_TTL = "state_cache_ttl"  # Seconds a read lamp state is reused by later reads
+CONF_MIN_SCAN_INTERVAL = "min_scan_interval"  # Fastest poll interval right after commands
+CONF_MAX_SCAN_INTERVAL = "max_scan_interval"  # Slowest poll interval when idle or offline
+CONF_GROUP_MEMBERS = "group_members"  # Lamp IDs controlled together with this lamp as a group
 
 # Defaults
 DEFAULT_SCAN_INTERVAL = 10  # Poll every 10 seconds for real-time updates
+DEFAULT_KEEP_WARM = 8.0  # Bridge usually stays connected a few seconds after a command
+DEFAULT_CONFIRM_COMMANDS = False
+DEFAULT_STATE_CACHE_TTL = 1.0  # Long enough for bursts of reads, short enough to never hide changes
+DEFAULT_MIN_SCAN_INTERVAL = 2  # Poll every 2 seconds while a command settles
+DEFAULT_MAX_SCAN_INTERVAL = 60  # Poll at least once a minute
+
+# Adaptive polling
+POLL_BURST_WINDOW = 20  # Seconds of fast polling after a command
+POLL_IDLE_STEP = 6  # Unchanged polls before the interval doubles
+STARTUP_REFRESH_DELAY = 1.0  # Seconds to gather lamps set up together into the first poll
+
+# Poll scheduling across all accounts
+POLL_MAX_IN_FLIGHT = 4  # State polls sent at once, across all accounts
+POLL_SPREAD_SHARE = 0.5  # Share of the poll interval the lamp polls of an account are spread over
+POLL_SPREAD_MAX = 10.0  # Longest time in seconds the lamp polls of an account are spread over
+POLL_JITTER = 0.1  # Share of the poll interval added or taken at random
+
+# hass.data keys
+DATA_ACCOUNTS = "accounts"  # Dict mapping API token to its shared account resources
+DATA_WAKE_DELAYS = "wake_delays"  # Learned BLE wake delays of all lamps
+DATA_POLL_SCHEDULER = "poll_scheduler"  # Poll scheduler shared by all accounts
+DATA_SCENE_STATES = "scene_states"  # Learned scene results of all lamps
+
+# Storage
+STORAGE_VERSION = 1
+STORAGE_KEY_WAKE_DELAYS = f"{DOMAIN}.wake_delays"
+STORAGE_KEY_SCENE_STATES = f"{DOMAIN}.scene_states"
+STORAGE_SAVE_DELAY = 30  # Seconds to gather changes before writing them to storage
 
 # API Configuration
 API_BASE_URL = "https://cloud.luke-roberts.com/api/v1"
 API_TIMEOUT = 10
+BLE_WAKE_DELAY = 2.0  # Seconds between the bridge wake-up send and the actual send
+
+# Learned BLE wake delay per lamp
+WAKE_DELAY_MIN = 0.5  # Shortest wake delay ever tried
+WAKE_DELAY_MAX = 5.0  # Longest wake delay ever used
+WAKE_DELAY_MARGIN = 0.5  # Seconds kept above the longest delay seen failing twice
+WAKE_TUNE_STEP = 0.25  # Seconds the delay shrinks by after a streak of successes
+WAKE_TUNE_STREAK = 3  # Successes in a row before a shorter delay is tried
+WAKE_SAMPLE_EVERY = 10  # Once tuned, wake-ups between read-backs checking the delay
+WAKE_FLOOR_DECAY_STREAK = 10  # Successes in a row before the longest failing delay is tried again
+
+# Command confirmation by state read-back
+CONFIRM_POLL_INTERVAL = 0.5  # Seconds between state reads while waiting for a command
+CONFIRM_TIMEOUT = 3.0  # Seconds to wait for a command to show up before resending it
+CONFIRM_SENDS = 3  # Sends of a command before giving up
+
+# Push updates through the event stream of the cloud
+PUSH_HEARTBEAT_TIMEOUT = 90  # Seconds without any data before the stream counts as dead
+PUSH_RECONNECT_DELAY = 5  # Seconds before the first reconnect, doubled after each failure
+PUSH_MAX_RECONNECT_DELAY = 300  # Longest wait between reconnects
+
+# Client-side transitions
+TRANSITION_MAX_STEPS = 60  # Steps per fade, however long it is
+TRANSITION_MIN_STEP_INTERVAL = 0.5  # Seconds between two steps at least
+TRANSITION_RATE_SHARE = 0.5  # Share of the account request budget used by all running fades
+
+# Optimistic state
+PENDING_COMMAND_TIMEOUT = 30  # Seconds polled state may lag behind a command before it wins
+
+# Learned scene results
+SCENE_LEARN_DELAY = 3.0  # Seconds after a scene a state without timestamp is trusted to show it
+SCENE_LEARN_TIMEOUT = 60  # Seconds a scene activation waits for a state showing its result
+
+# Group lights
+GROUP_CONCURRENCY = 20  # Member lamps commanded at the same time, matches API_RATE_BURST
+
+# Connection pool shared by all lamps of one account
+API_CONNECTION_LIMIT = 10  # Max parallel connections to the cloud per account
+API_DNS_CACHE_TTL = 300  # Seconds to cache DNS lookups
+API_KEEPALIVE_TIMEOUT = 60  # Seconds to keep idle connections open
+
+# Request budget per account, shared by commands and polls
+API_RATE_LIMIT = 10.0  # Requests per second on average
+API_RATE_BURST = 20  # Requests that may be sent at once after a quiet period
+
+# Retries of idempotent requests and circuit breaker per account
+API_RETRY_ATTEMPTS = 2  # Retries after timeouts, connection and server errors
+API_RETRY_BACKOFF = 0.5  # Base of the jittered exponential backoff in seconds
+CIRCUIT_FAILURE_THRESHOLD = 5  # Consecutive failures before failing fast
+CIRCUIT_RESET_TIMEOUT = 30  # Seconds before a single probe request is let through
+
+# Services
+SERVICE_PREWARM = "prewarm"
+SERVICE_PROFILE = "profile"
+SERVICE_RECORD = "record"
+ATTR_DURATION = "duration"
+ATTR_MEMORY = "memory"
+
+# Profiling
+PROFILE_DEFAULT_DURATION = 60  # Seconds profiled unless the service call says otherwise
+PROFILE_LAG_INTERVAL = 0.05  # Seconds between event loop lag samples
+PROFILE_TOP_ENTRIES = 25  # Functions and allocation sites listed in a report
+
+# Traffic recording
+RECORD_DEFAULT_DURATION = 300  # Seconds recorded unless the service call says otherwise
 
 # API Endpoints
 ENDPOINT_LAMPS = "/lamps"
 ENDPOINT_LAMP_STATE = "/lamps/{lamp_id}/state"
 ENDPOINT_LAMP_COMMAND = "/lamps/{lamp_id}/command"
+ENDPOINT_LAMP_EVENTS = "/lamps/events"  # Not documented, state changes of all lamps if available
 
 # Power States
 STATE_ON = "ON"
@@ -0,0 +1,485 @@
+"""Data update coordinator for the Luke Roberts integration."""
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+import logging
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .api import LukeRobertsApi, LukeRobertsApiError, LukeRobertsAuthError
+from .const import (
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_SCAN_INTERVAL,
+    DOMAIN,
+    POLL_BURST_WINDOW,
+    POLL_IDLE_STEP,
+    POLL_JITTER,
+    POLL_SPREAD_SHARE,
+    STARTUP_REFRESH_DELAY,
+)
+from .models import LampState
+from .polling import async_get_poll_scheduler
+from .transport import StreamTransport, UpdateTransport
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _lamp_id_from_listing(lamp: dict[str, Any]) -> int | None:
+    """Return the lamp ID of an entry from the /lamps listing."""
+    for key in ("id", "lamp_id", "lampId"):
+        if key in lamp:
+            try:
+                return int(lamp[key])
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+def _state_from_listing(lamp: dict[str, Any]) -> LampState | None:
+    """Return the state embedded in an entry from the /lamps listing, if any.
+
+    The listing is not documented to carry state. Depending on the API version
+    the state is either nested under "state" or the lamp entry itself uses the
+    same fields as /lamps/{lamp_id}/state.
+    """
+    state = lamp.get("state")
+    if isinstance(state, dict):
+        return LampState.from_dict(state)
+    if "on" in lamp:
+        return LampState.from_dict(lamp)
+    return None
+
+
+class AdaptivePollPolicy:
+    """Choose the poll interval of an account from recent activity.
+
+    - For POLL_BURST_WINDOW seconds after a command, the commanded lamp is
+      polled at the minimum interval so the UI settles quickly. The other
+      lamps of the account keep their regular interval.
+    - The regular interval doubles every POLL_IDLE_STEP regular polls that
+      brought no change, up to the maximum interval.
+    - Lamps the cloud reports offline back off exponentially on their own.
+      While every lamp of the account is offline, the account interval
+      follows that backoff.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the policy."""
+        self.min_interval: float = DEFAULT_MIN_SCAN_INTERVAL
+        self.max_interval: float = DEFAULT_MAX_SCAN_INTERVAL
+        # Monotonic end of fast polling per commanded lamp
+        self._burst_until: dict[int, float] = {}
+        # Monotonic time the next poll of all lamps is due
+        self._regular_due_at = 0.0
+        self._unchanged_polls = 0
+        # Consecutive offline polls and monotonic retry time per offline lamp
+        self._offline_polls: dict[int, int] = {}
+        self._offline_retry_at: dict[int, float] = {}
+
+    @property
+    def base_interval(self) -> float:
+        """Return the regular poll interval within the configured limits."""
+        return max(self.min_interval, min(self.max_interval, DEFAULT_SCAN_INTERVAL))
+
+    @property
+    def regular_interval(self) -> float:
+        """Return the interval of the poll of all lamps, stretched while nothing changes."""
+        return min(
+            self.max_interval,
+            self.base_interval * 2 ** (self._unchanged_polls // POLL_IDLE_STEP),
+        )
+
+    def note_command(self, lamp_id: int) -> None:
+        """Switch a lamp to fast polling after a command to it."""
+        self._burst_until[lamp_id] = time.monotonic() + POLL_BURST_WINDOW
+        self._unchanged_polls = 0
+        # Check an offline lamp right away instead of waiting for its backoff
+        self._offline_retry_at.pop(lamp_id, None)
+
+    def burst_lamps(self) -> list[int]:
+        """Return the lamps polled fast after a recent command."""
+        now = time.monotonic()
+        for lamp_id, until in list(self._burst_until.items()):
+            if now >= until:
+                del self._burst_until[lamp_id]
+        return list(self._burst_until)
+
+    def regular_poll_due(self) -> bool:
+        """Return if all lamps are due for a poll, not only the commanded ones."""
+        # Jittered timers fire up to POLL_JITTER early, that must not skip the poll
+        return time.monotonic() >= self._regular_due_at - self.regular_interval * POLL_JITTER
+
+    def note_poll(self, changed: bool, started: float) -> None:
+        """Record whether a poll of all lamps, started at monotonic time started, brought any change."""
+        if changed:
+            self._unchanged_polls = 0
+        elif self._unchanged_polls < POLL_IDLE_STEP * 16:
+            self._unchanged_polls += 1
+        self._regular_due_at = started + self.regular_interval
+
+    def note_lamp_online(self, lamp_id: int, online: bool) -> None:
+        """Record whether a lamp was reachable in the last poll."""
+        if online:
+            self._offline_polls.pop(lamp_id, None)
+            self._offline_retry_at.pop(lamp_id, None)
+            return
+
+        count = self._offline_polls.get(lamp_id, 0) + 1
+        self._offline_polls[lamp_id] = count
+        backoff = min(self.max_interval, self.base_interval * 2 ** min(count - 1, 16))
+        self._offline_retry_at[lamp_id] = time.monotonic() + backoff
+
+    def forget_lamp(self, lamp_id: int) -> None:
+        """Drop all state kept for a lamp."""
+        self._offline_polls.pop(lamp_id, None)
+        self._offline_retry_at.pop(lamp_id, None)
+        self._burst_until.pop(lamp_id, None)
+
+    def should_poll_lamp(self, lamp_id: int) -> bool:
+        """Return if a lamp is due for its own state request."""
+        return time.monotonic() >= self._offline_retry_at.get(lamp_id, 0.0)
+
+    def next_interval(self, lamp_ids: list[int], started: float | None = None) -> float:
+        """Return the interval until the next poll of the account, counted from the poll started then."""
+        if self.burst_lamps():
+            return self.min_interval
+
+        now = time.monotonic()
+        interval = self.regular_interval
+        if started is not None:
+            # After fast polling ends, the poll of all lamps may be due sooner
+            interval = max(self.min_interval, min(interval, self._regular_due_at - started))
+        if lamp_ids and all(lamp_id in self._offline_retry_at for lamp_id in lamp_ids):
+            interval = max(interval, min(self._offline_retry_at.values()) - now)
+        return interval
+
+
+class LukeRobertsCoordinator(DataUpdateCoordinator[dict[int, LampState]]):
+    """Fetch the state of every lamp of one Luke Roberts account.
+
+    One coordinator exists per API token and is shared by all config entries
+    using that token. Every poll first tries the /lamps listing, which covers
+    all lamps in one request. If the listing does not carry state, each lamp is
+    queried through /lamps/{lamp_id}/state instead. Those requests are spread
+    over part of the interval by the poll scheduler shared by all accounts.
+
+    Where the cloud pushes state changes through its event stream, polling
+    pauses while the stream is open.
+    """
+
+    def __init__(self, hass: HomeAssistant, api_token: str) -> None:
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=DOMAIN,
+            update_interval=timedelta(seconds=DEFAULT_SCAN_INTERVAL),
+        )
+        self.api_token = api_token
+        self.policy = AdaptivePollPolicy()
+        self.poll_scheduler = async_get_poll_scheduler(hass)
+        # Interval chosen by the policy, before jitter
+        self._poll_interval: float = DEFAULT_SCAN_INTERVAL
+        self._apis: dict[int, LukeRobertsApi] = {}
+        # Configured (min, max) poll intervals per lamp
+        self._poll_intervals: dict[int, tuple[float, float]] = {}
+        # None until we know whether the /lamps listing includes lamp state
+        self._listing_has_state: bool | None = None
+        # Lamps changed by the last update
+        self._changed_lamp_ids: set[int] = set()
+        self._startup_refresh: asyncio.Task | None = None
+        # Falls back to a PollingTransport if the cloud has no event stream
+        self.transport: UpdateTransport = StreamTransport(hass, self)
+
+    @property
+    def lamp_ids(self) -> list[int]:
+        """Return the IDs of all lamps handled by this coordinator."""
+        return list(self._apis)
+
+    @property
+    def apis(self) -> list[LukeRobertsApi]:
+        """Return the API clients of all lamps handled by this coordinator."""
+        return list(self._apis.values())
+
+    @property
+    def listing_has_state(self) -> bool | None:
+        """Return whether the /lamps listing carries lamp state, if known yet."""
+        return self._listing_has_state
+
+    @property
+    def push_active(self) -> bool:
+        """Return if lamp state is currently pushed instead of polled."""
+        return self.transport.push_active
+
+    @callback
+    def async_set_transport(self, transport: UpdateTransport) -> None:
+        """Replace the update transport, e.g. to fall back to polling."""
+        self.transport.stop()
+        self.transport = transport
+        if self._apis:
+            transport.start()
+        self.async_push_changed()
+
+    @callback
+    def async_push_changed(self) -> None:
+        """Pause polling while state is pushed and resume it otherwise."""
+        if self.push_active:
+            self.update_interval = None
+        else:
+            self.update_interval = timedelta(seconds=self.policy.next_interval(self.lamp_ids))
+        # Catch up on changes made while switching, this also reschedules polls
+        if self.data is not None:
+            self.hass.async_create_task(self.async_request_refresh())
+
+    @callback
+    def async_add_lamp(self, api: LukeRobertsApi) -> asyncio.Task | None:
+        """Register a lamp and fetch its state in the background.
+
+        Lamps registered within STARTUP_REFRESH_DELAY of each other share one
+        refresh. Returns its task, or None if the state of the lamp is known.
+        """
+        self._apis[api.lamp_id] = api
+        self.transport.start()
+        if self.data is not None and api.lamp_id in self.data:
+            return None
+        if self._startup_refresh is None:
+            self._startup_refresh = self.hass.async_create_background_task(
+                self._async_startup_refresh(), name=f"{DOMAIN} startup refresh"
+            )
+        return self._startup_refresh
+
+    async def async_first_refresh_lamp(self, api: LukeRobertsApi) -> None:
+        """Register a lamp and wait for its first state.
+
+        Works like async_config_entry_first_refresh for a coordinator
+        shared by several entries: lamps set up together still share one
+        refresh.
+
+        Raises:
+            ConfigEntryNotReady: If the refresh failed or did not include the lamp
+        """
+        refresh = self.async_add_lamp(api)
+        if refresh is not None:
+            # Other lamps wait for the same refresh, a cancelled setup must not stop it
+            await asyncio.shield(refresh)
+        if self.data is not None and api.lamp_id in self.data:
+            return
+        raise ConfigEntryNotReady(
+            f"Could not fetch the state of lamp {api.lamp_id}: {self.last_exception}"
+        ) from self.last_exception
+
+    async def _async_startup_refresh(self) -> None:
+        """Fetch the state of newly registered lamps."""
+        await asyncio.sleep(STARTUP_REFRESH_DELAY)
+        # Lamps registered from now on need another refresh
+        self._startup_refresh = None
+        await self.async_refresh()
+
+    def remove_lamp(self, lamp_id: int) -> bool:
+        """Unregister a lamp. Return True if no lamps are left."""
+        self._apis.pop(lamp_id, None)
+        self.policy.forget_lamp(lamp_id)
+        if self.data is not None:
+            self.data.pop(lamp_id, None)
+        if self._poll_intervals.pop(lamp_id, None) is not None:
+            self._update_poll_limits()
+        if not self._apis:
+            self.transport.stop()
+            if self._startup_refresh is not None:
+                self._startup_refresh.cancel()
+                self._startup_refresh = None
+        return not self._apis
+
+    def set_poll_intervals(self, lamp_id: int, min_interval: float, max_interval: float) -> None:
+        """Set the poll interval limits configured for a lamp.
+
+        The account is polled as often as its most demanding lamp requires.
+        """
+        self._poll_intervals[lamp_id] = (min_interval, max_interval)
+        self._update_poll_limits()
+
+    def _update_poll_limits(self) -> None:
+        """Apply the poll interval limits of all lamps to the policy."""
+        if not self._poll_intervals:
+            return
+        self.policy.min_interval = min(limits[0] for limits in self._poll_intervals.values())
+        self.policy.max_interval = max(
+            self.policy.min_interval,
+            min(limits[1] for limits in self._poll_intervals.values()),
+        )
+
+    def lamp_changed(self, lamp_id: int) -> bool:
+        """Return if the state of a lamp changed in the last update."""
+        return lamp_id in self._changed_lamp_ids
+
+    @callback
+    def async_note_command(self, lamp_id: int) -> None:
+        """Poll fast for a while after a command was sent to a lamp."""
+        if self.push_active:
+            # The change is pushed once the lamp applied it
+            return
+        self.policy.note_command(lamp_id)
+        self.update_interval = timedelta(seconds=self.policy.min_interval)
+
+    @callback
+    def async_set_lamp_state(self, lamp_id: int, state: LampState) -> None:
+        """Take over a lamp state read outside of a poll, e.g. pushed or read to confirm a command.
+
+        Unlike async_set_updated_data, this neither reschedules the next poll,
+        which steady push traffic would otherwise postpone indefinitely, nor
+        marks a failed last poll of the account as successful.
+        """
+        if self.data is None or lamp_id not in self._apis:
+            return
+        self._apis[lamp_id].set_online(state.reachable)
+        states = {lamp_id: state}
+        self._detect_changes(states)
+        self.data = {**self.data, **states}
+        self.async_update_listeners()
+
+    @callback
+    def async_set_listing_entry(self, lamp: dict[str, Any]) -> None:
+        """Take over the state of a lamp in the format of the /lamps listing, e.g. pushed."""
+        lamp_id = _lamp_id_from_listing(lamp)
+        state = _state_from_listing(lamp)
+        if lamp_id is not None and state is not None:
+            self.async_set_lamp_state(lamp_id, state)
+
+    async def _async_update_data(self) -> dict[int, LampState]:
+        """Fetch the state of all registered lamps, or only of recently commanded ones.
+
+        Between polls of all lamps, only the lamps in their fast polling
+        window after a command are fetched, the others keep their state.
+        """
+        if not self._apis:
+            return {}
+
+        lamp_ids = list(self._apis)
+        started = time.monotonic()
+        regular = self.policy.regular_poll_due()
+        polled = lamp_ids
+        if not regular:
+            polled = [lamp_id for lamp_id in self.policy.burst_lamps() if lamp_id in self._apis]
+        try:
+            states: dict[int, LampState] = {}
+            # The listing covers every lamp with one request, commanded or not
+            if self._listing_has_state is not False and (regular or self._listing_has_state):
+                states = await self._async_fetch_listing()
+
+            missing = [lamp_id for lamp_id in polled if lamp_id not in states]
+            due = [lamp_id for lamp_id in missing if self.policy.should_poll_lamp(lamp_id)]
+            if due:
+                states.update(await self._async_fetch_lamps(due))
+        except LukeRobertsAuthError as err:
+            raise UpdateFailed(f"Authentication failed: {err}") from err
+        except LukeRobertsApiError as err:
+            raise UpdateFailed(f"Error communicating with API: {err}") from err
+
+        for lamp_id in lamp_ids:
+            state = states.get(lamp_id)
+            if state is None:
+                # Not polled this time or backing off, keep its last known state
+                if lamp_id not in due and self.data and lamp_id in self.data:
+                    states[lamp_id] = self.data[lamp_id]
+                continue
+            # Only the cloud saying the lamp is offline backs off, not a failed request
+            self.policy.note_lamp_online(lamp_id, state.reachable)
+            # Replays commands buffered while the lamp was offline
+            self._apis[lamp_id].set_online(state.reachable)
+
+        self._detect_changes(states)
+        if regular:
+            self.policy.note_poll(changed=bool(self._changed_lamp_ids), started=started)
+        if self.push_active:
+            self.update_interval = None
+            return states
+        interval = self.policy.next_interval(lamp_ids, started)
+        if interval != self._poll_interval:
+            _LOGGER.debug("Polling account every %.1f seconds", interval)
+        self._poll_interval = interval
+        # Polls start about one interval apart, however long spreading the requests took
+        jittered = self.poll_scheduler.jitter(interval)
+        self.update_interval = timedelta(
+            seconds=max(jittered - (time.monotonic() - started), jittered * (1 - POLL_SPREAD_SHARE))
+        )
+
+        return states
+
+    def _detect_changes(self, states: dict[int, LampState]) -> None:
+        """Find the lamps whose state changed since the last update.
+
+        Unchanged lamps keep their previous state object, so entities can
+        skip parsing and writing it again.
+        """
+        self._changed_lamp_ids = set()
+        previous = self.data or {}
+        for lamp_id, state in states.items():
+            old = previous.get(lamp_id)
+            if old == state:
+                states[lamp_id] = old
+                continue
+            self._changed_lamp_ids.add(lamp_id)
+
+    async def _async_fetch_listing(self) -> dict[int, LampState]:
+        """Fetch lamp states from the /lamps listing."""
+        api = next(iter(self._apis.values()))
+        lamps = await self.poll_scheduler.async_poll(api.get_lamps)
+
+        states: dict[int, LampState] = {}
+        for lamp in lamps:
+            if not isinstance(lamp, dict):
+                continue
+            lamp_id = _lamp_id_from_listing(lamp)
+            if lamp_id not in self._apis:
+                continue
+            state = _state_from_listing(lamp)
+            if state is not None:
+                states[lamp_id] = state
+
+        if self._listing_has_state is None:
+            self._listing_has_state = bool(states)
+            _LOGGER.debug(
+                "Lamp listing %s state, using %s",
+                "includes" if states else "does not include",
+                "one request per poll" if states else "one request per lamp",
+            )
+
+        return states
+
+    async def _async_fetch_lamps(self, lamp_ids: list[int]) -> dict[int, LampState]:
+        """Fetch the state of the given lamps one request per lamp.
+
+        Recently commanded lamps are fetched right away, the others are
+        spread over part of the interval.
+        """
+        scheduler = self.poll_scheduler
+        commanded = set(self.policy.burst_lamps())
+        spread = [lamp_id for lamp_id in lamp_ids if lamp_id not in commanded]
+        delays = dict(zip(spread, scheduler.offsets(len(spread), scheduler.spread_window(self._poll_interval))))
+        results = await asyncio.gather(
+            *(scheduler.async_poll(self._apis[lamp_id].get_state, delays.get(lamp_id, 0.0)) for lamp_id in lamp_ids),
+            return_exceptions=True,
+        )
+
+        states: dict[int, LampState] = {}
+        errors: list[BaseException] = []
+        for lamp_id, result in zip(lamp_ids, results):
+            if isinstance(result, BaseException):
+                if not isinstance(result, LukeRobertsApiError):
+                    raise result
+                _LOGGER.debug("Error updating lamp %s: %s", lamp_id, result)
+                errors.append(result)
+                continue
+            states[lamp_id] = result
+
+        # Only fail the whole update if no lamp could be reached at all
+        if errors and not states:
+            raise errors[0]
+
+        return states
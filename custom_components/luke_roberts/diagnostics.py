@@ -0,0 +1,59 @@
+"""Diagnostics support for the Luke Roberts integration."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .account import async_get_account
+from .api import LukeRobertsApi
+from .const import CONF_API_TOKEN, DOMAIN
+from .metrics import ApiMetrics
+
+TO_REDACT = {CONF_API_TOKEN}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    api: LukeRobertsApi = hass.data[DOMAIN][entry.entry_id]
+    account = async_get_account(hass, api.api_token)
+    coordinator = account.get_coordinator(hass)
+
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "lamp": {
+            "lamp_id": api.lamp_id,
+            "bridge_warm": api.is_bridge_warm,
+            "keep_warm": api.keep_warm,
+            "wake_delay": api.wake_delay,
+            "wake_tuner": api.wake_tuner.as_dict() if api.wake_tuner else None,
+            "online": api.online,
+            "buffered_commands": api.buffered_commands,
+            "state": state.as_dict() if (state := (coordinator.data or {}).get(api.lamp_id)) else None,
+            "pending_commands": (
+                light.ledger.pending_kinds if (light := account.lights.get(api.lamp_id)) else []
+            ),
+            "scenes": light.scenes.as_dict() if light else {},
+            "metrics": api.metrics.as_dict(),
+        },
+        "account": {
+            "lamp_ids": coordinator.lamp_ids,
+            "listing_has_state": coordinator.listing_has_state,
+            "transport": coordinator.transport.name,
+            "push_active": coordinator.push_active,
+            "last_update_success": coordinator.last_update_success,
+            "circuit": account.circuit_breaker.state,
+            "groups": account.groups,
+            "update_interval": (
+                coordinator.update_interval.total_seconds()
+                if coordinator.update_interval
+                else None
+            ),
+            "poll_scheduler": coordinator.poll_scheduler.as_dict(),
+            "metrics": ApiMetrics.merged([item.metrics for item in coordinator.apis]).as_dict(),
+        },
+    }
@@ -0,0 +1,135 @@
+"""Ledger of commands a lamp may not show in its polled state yet."""
+from __future__ import annotations
+
+from datetime import datetime
+import logging
+import math
+import time
+from typing import Any
+
+import homeassistant.util.dt as dt_util
+
+from .api import BUFFERED_RESULT, command_applied, command_kind
+from .const import PENDING_COMMAND_TIMEOUT
+from .models import LampState
+
+_LOGGER = logging.getLogger(__name__)
+
+# Command kinds whose outcome the polled state shows
+TRACKED_KINDS = frozenset({"power", "brightness", "kelvin"})
+
+
+class _LedgerEntry:
+    """A command of one kind and when it was sent."""
+
+    __slots__ = ("command", "sent_at", "expires", "buffered")
+
+    def __init__(self, command: dict[str, Any]) -> None:
+        """Initialize the entry of a command that was just queued."""
+        self.command = command
+        # Wall-clock time the cloud accepted the final send, None while queued
+        self.sent_at: datetime | None = None
+        self.expires = time.monotonic() + PENDING_COMMAND_TIMEOUT
+        # Held back while the lamp is offline, replayed once it is back
+        self.buffered = False
+
+    def sent(self) -> None:
+        """Record that the cloud accepted the final send."""
+        self.sent_at = dt_util.utcnow()
+        self.expires = time.monotonic() + PENDING_COMMAND_TIMEOUT
+        self.buffered = False
+
+
+class PendingCommandLedger:
+    """Latest command per kind sent to a lamp, until its state shows it.
+
+    Commands reach the lamp some time after they were queued, so a poll in
+    between still shows the old values. While a command is pending, polled
+    values that differ from it are stale if they were last updated before
+    the command was sent. An entry settles once the state shows the
+    command, a state updated after the send shows something else, or
+    PENDING_COMMAND_TIMEOUT passed after the send.
+
+    Commands buffered for an offline lamp stay pending without timing out
+    until their replay was sent, or dropped if it failed.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty ledger."""
+        self._entries: dict[str, _LedgerEntry] = {}
+
+    @property
+    def pending_kinds(self) -> list[str]:
+        """Return the kinds of the pending commands."""
+        return list(self._entries)
+
+    def add(self, commands: list[dict[str, Any]]) -> None:
+        """Record queued commands, replacing pending ones of the same kind."""
+        for command in commands:
+            kind = command_kind(command)
+            if kind in TRACKED_KINDS:
+                self._entries[kind] = _LedgerEntry(command)
+
+    def mark_sent(self, commands: list[dict[str, Any]], results: list[Any] | None = None) -> None:
+        """Record that the cloud accepted the final send of commands.
+
+        Commands whose result in results is BUFFERED_RESULT were not sent but
+        buffered for an offline lamp, they stay pending until replayed.
+        """
+        if results is None:
+            results = [None] * len(commands)
+        for command, result in zip(commands, results):
+            entry = self._entries.get(command_kind(command))
+            if entry is None or entry.command is not command:
+                continue
+            if result is BUFFERED_RESULT:
+                entry.buffered = True
+                entry.expires = math.inf
+            else:
+                entry.sent()
+
+    def replayed(self, command: dict[str, Any], sent: bool) -> None:
+        """Settle buffered commands once their replay was sent or failed.
+
+        A scene stands for all values buffered with it, which is what the
+        ledger expects the scene to set.
+        """
+        kind = command_kind(command)
+        if kind == "scene":
+            kinds = [kind for kind, entry in self._entries.items() if entry.buffered]
+        else:
+            entry = self._entries.get(kind)
+            kinds = [kind] if entry is not None and entry.buffered and entry.command == command else []
+        for kind in kinds:
+            if sent:
+                self._entries[kind].sent()
+            else:
+                del self._entries[kind]
+
+    def discard(self, commands: list[dict[str, Any]]) -> None:
+        """Forget commands that failed."""
+        for command in commands:
+            kind = command_kind(command)
+            entry = self._entries.get(kind)
+            if entry is not None and entry.command is command:
+                del self._entries[kind]
+
+    def stale_kinds(self, state: LampState) -> set[str]:
+        """Settle entries against a polled state and return the kinds it shows stale."""
+        if not self._entries:
+            return set()
+        updated = dt_util.parse_datetime(state.updated_at) if state.updated_at else None
+        now = time.monotonic()
+
+        stale: set[str] = set()
+        for kind, entry in list(self._entries.items()):
+            if command_applied(entry.command, state):
+                del self._entries[kind]
+            elif now >= entry.expires or (
+                entry.sent_at is not None and updated is not None and updated > entry.sent_at
+            ):
+                _LOGGER.debug("Dropping pending %s, the lamp state shows otherwise", entry.command)
+                del self._entries[kind]
+            else:
+                stale.add(kind)
+        return stale
@@ -1,7 +1,8 @@
 """Light platform for Luke Roberts integration."""
 from __future__ import annotations
 
-from datetime import timedelta
+import asyncio
+from collections.abc import Awaitable, Callable, Mapping
 import logging
 from typing import Any
 
@@ -11,35 +12,80 @@ from homeassistant.components.light import (
     ATTR_EFFECT,
     ATTR_HS_COLOR,
     ATTR_RGB_COLOR,
+    ATTR_TRANSITION,
     ColorMode,
     LightEntity,
     LightEntityFeature,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import STATE_OFF as HA_STATE_OFF, STATE_ON as HA_STATE_ON
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_platform
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.restore_state import RestoreEntity
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 import homeassistant.util.color as color_util
 
-from .api import LukeRobertsApi
+from .account import LukeRobertsAccount, async_get_account
+from .api import BUFFERED_RESULT, LukeRobertsApi
 from .const import (
+    CONF_API_TOKEN,
     CONF_DEVICE_NAME,
+    CONF_GROUP_MEMBERS,
     CONF_LAMP_ID,
     CONF_SCENE_NAMES,
-    DEFAULT_SCAN_INTERVAL,
     DOMAIN,
+    GROUP_CONCURRENCY,
     MAX_BRIGHTNESS,
     MAX_KELVIN,
     MAX_SCENE,
     MIN_BRIGHTNESS,
     MIN_KELVIN,
     MIN_SCENE,
+    SERVICE_PREWARM,
+    STATE_OFF,
+    STATE_ON,
 )
-
-SCAN_INTERVAL = timedelta(seconds=DEFAULT_SCAN_INTERVAL)
+from .coordinator import LukeRobertsCoordinator
+from .ledger import PendingCommandLedger
+from .models import LampState
+from .scenes import LampScenes, async_get_scene_store
+from .transition import async_run_transition, plan_transition, step_interval
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def ha_to_lamp_brightness(brightness: int) -> int:
+    """Convert a HA brightness (0-255) to the lamp brightness (0-100).
+
+    Progressive brightness scaling for better control:
+    - 0-70% HA (0-179): maps to 0-50% API (fine control in normal range)
+    - 70-100% HA (179-255): maps to 50-100% API (steeper, access to full brightness)
+    """
+    if brightness <= 179:  # 0-70% range
+        # Linear mapping: 0-179 HA → 0-50 API
+        return int((brightness / 179) * 50)
+    # Linear mapping: 179-255 HA → 50-100 API
+    return int(50 + ((brightness - 179) / 76) * 50)
+
+
+def lamp_to_ha_brightness(lamp_brightness: int) -> int:
+    """Convert a lamp brightness (1-100) to the HA brightness (1-255).
+
+    Reverse progressive scaling:
+    - 0-50% API (0-50): maps to 0-70% HA (0-179)
+    - 50-100% API (50-100): maps to 70-100% HA (179-255)
+    """
+    if lamp_brightness <= 50:  # 0-50% API range
+        # Reverse mapping: 0-50 API → 0-179 HA
+        brightness = int((lamp_brightness / 50) * 179)
+    else:  # 50-100% API range
+        # Reverse mapping: 50-100 API → 179-255 HA
+        brightness = int(179 + ((lamp_brightness - 50) / 50) * 76)
+    # Ensure minimum brightness of 1 in HA (0 means off), cap at 255 just in case
+    return max(1, min(255, brightness))
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     config_entry: ConfigEntry,
@@ -47,25 +93,66 @@ async def async_setup_entry(
 ) -> None:
     """Set up Luke Roberts light from a config entry."""
     api: LukeRobertsApi = hass.data[DOMAIN][config_entry.entry_id]
+    account = async_get_account(hass, config_entry.data[CONF_API_TOKEN])
+    coordinator = account.get_coordinator(hass)
     device_name = config_entry.data[CONF_DEVICE_NAME]
     lamp_id = config_entry.data[CONF_LAMP_ID]
+    # The scene results learned for this lamp carry over restarts and reloads
+    scene_store = await async_get_scene_store(hass)
+
+    entities: list[LightEntity] = [
+        LukeRobertsLight(coordinator, api, device_name, lamp_id, config_entry, scene_store.lamp(lamp_id))
+    ]
+
+    # Optional group of this lamp and other lamps of the same account
+    members = [int(member) for member in config_entry.options.get(CONF_GROUP_MEMBERS, [])]
+    account.groups[lamp_id] = members
+    if members:
+        entities.append(
+            LukeRobertsGroupLight(coordinator, account, device_name, lamp_id, [lamp_id, *members])
+        )
+
+    async_add_entities(entities)
+
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(SERVICE_PREWARM, {}, "async_prewarm")
 
-    async_add_entities([LukeRobertsLight(api, device_name, lamp_id, config_entry)])
 
+class LukeRobertsLight(CoordinatorEntity[LukeRobertsCoordinator], LightEntity, RestoreEntity):
+    """Representation of a Luke Roberts Model F lamp.
 
-class LukeRobertsLight(LightEntity):
-    """Representation of a Luke Roberts Model F lamp."""
+    Until the first poll after startup has the lamp, the light shows its
+    state from before the restart.
+    """
 
     _attr_has_entity_name = True
     _attr_name = None
-    _attr_should_poll = True
 
-    def __init__(self, api: LukeRobertsApi, device_name: str, lamp_id: int, config_entry: ConfigEntry) -> None:
-        """Initialize the light."""
+    def __init__(
+        self,
+        coordinator: LukeRobertsCoordinator,
+        api: LukeRobertsApi,
+        device_name: str,
+        lamp_id: int,
+        config_entry: ConfigEntry,
+        scenes: LampScenes | None = None,
+    ) -> None:
+        """Initialize the light, scenes holds the learned scene results of the lamp."""
+        super().__init__(coordinator)
         self._api = api
         self._device_name = device_name
         self._lamp_id = lamp_id
         self._config_entry = config_entry
+        # Availability at the last state write, to notice changes without new data
+        self._was_available = True
+        # Whether the state was restored and no poll updated it yet
+        self._restored = False
+        # Commands the polled state may not show yet
+        self.ledger = PendingCommandLedger()
+        # Brightness and kelvin each scene ended up at, shown as soon as it is activated
+        self.scenes = scenes if scenes is not None else LampScenes()
+        # Fade running in the background, stopped by any newer command
+        self._transition: asyncio.Task | None = None
 
         # State attributes
         self._attr_is_on = False
@@ -88,8 +175,8 @@ class LukeRobertsLight(LightEntity):
         self._attr_min_color_temp_kelvin = MIN_KELVIN
         self._attr_max_color_temp_kelvin = MAX_KELVIN
 
-        # Scene/Effect support
-        self._attr_supported_features = LightEntityFeature.EFFECT
+        # Scene/Effect support, transitions are faded client-side
+        self._attr_supported_features = LightEntityFeature.EFFECT | LightEntityFeature.TRANSITION
         # Scenes 1-31 (Scene 0 = Off, which is handled by power)
         # Get custom scene names from options, or use defaults
         custom_scene_names = config_entry.options.get(CONF_SCENE_NAMES, {})
@@ -112,8 +199,21 @@ class LukeRobertsLight(LightEntity):
             "model": "Model F",
         }
 
+    @property
+    def transitioning(self) -> bool:
+        """Return if a fade is running."""
+        return self._transition is not None and not self._transition.done()
+
+    @property
+    def available(self) -> bool:
+        """Return if the lamp was part of the last successful update."""
+        return super().available and (
+            self._restored
+            or (self.coordinator.data is not None and self._lamp_id in self.coordinator.data)
+        )
+
     async def async_added_to_hass(self) -> None:
-        """Run when entity is added to hass - fetch initial state."""
+        """Run when entity is added to hass - apply initial state."""
         await super().async_added_to_hass()
 
         # Listen for options updates to refresh scene names
@@ -121,8 +221,29 @@ class LukeRobertsLight(LightEntity):
             self._config_entry.add_update_listener(self._async_update_listener)
         )
 
-        # Fetch initial state to properly initialize sliders
-        await self.async_update()
+        # Apply the state known to the coordinator to properly initialize sliders,
+        # or the state from before the restart while the first poll is running
+        if self.coordinator.data and self._lamp_id in self.coordinator.data:
+            self._apply_state(self.coordinator.data[self._lamp_id])
+        elif (last_state := await self.async_get_last_state()) is not None and last_state.state in (
+            HA_STATE_ON,
+            HA_STATE_OFF,
+        ):
+            self._restore_state(last_state.state, last_state.attributes)
+
+        # Commands buffered while the lamp was offline are only sent once it is back
+        self.async_on_remove(self._api.add_replay_listener(self.ledger.replayed))
+
+        # Make the light reachable for groups of the account
+        async_get_account(self.hass, self._api.api_token).lights[self._lamp_id] = self
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Run when entity will be removed from hass."""
+        await super().async_will_remove_from_hass()
+        self._cancel_transition()
+        lights = async_get_account(self.hass, self._api.api_token).lights
+        if lights.get(self._lamp_id) is self:
+            del lights[self._lamp_id]
 
     async def _async_update_listener(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
         """Handle options update."""
@@ -140,6 +261,19 @@ class LukeRobertsLight(LightEntity):
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn on the light."""
         _LOGGER.debug("Turning on light %s with kwargs: %s", self._lamp_id, kwargs)
+        self._cancel_transition()
+
+        transition = kwargs.get(ATTR_TRANSITION)
+        if transition and kwargs.get(ATTR_EFFECT) is None:
+            brightness = kwargs.get(ATTR_BRIGHTNESS)
+            kelvin = kwargs.get(ATTR_COLOR_TEMP_KELVIN)
+            if not self._attr_is_on:
+                # Lamp was off, fade to the default brightness and kelvin
+                brightness = 128 if brightness is None else brightness
+                kelvin = 3000 if kelvin is None else kelvin
+            if brightness is not None or kelvin is not None:
+                await self._async_start_transition(float(transition), brightness, kelvin)
+                return
 
         try:
             # Handle scene/effect selection separately
@@ -154,12 +288,40 @@ class LukeRobertsLight(LightEntity):
                         scene_num = int(effect.split()[-1])
 
                     if MIN_SCENE <= scene_num <= MAX_SCENE:
+                        # The values the scene set last time are shown right away,
+                        # the ledger keeps polls from before the scene from undoing them
+                        predicted = self.scenes.predict(scene_num)
+                        expected: list[dict[str, Any]] = []
+                        if scene_num != MIN_SCENE:
+                            expected.append({"power": STATE_ON})
+                        if predicted is not None:
+                            if predicted.brightness is not None:
+                                expected.append({"brightness": predicted.brightness})
+                            if predicted.kelvin is not None:
+                                expected.append({"kelvin": predicted.kelvin})
+                        self.scenes.activate(scene_num)
+                        self.ledger.add(expected)
                         # Send scene command (twice with delay for BLE bridge)
-                        await self._api.send_command_reliable({"scene": scene_num})
+                        try:
+                            result = await self._api.queue_command({"scene": scene_num})
+                        except Exception:
+                            self.ledger.discard(expected)
+                            self.scenes.cancel()
+                            raise
+                        self.ledger.mark_sent(expected, [result] * len(expected))
+                        self.scenes.mark_sent()
                         self._attr_effect = effect
                         self._attr_is_on = True
+                        if predicted is not None:
+                            if predicted.brightness:
+                                self._attr_brightness = lamp_to_ha_brightness(predicted.brightness)
+                            if predicted.kelvin is not None:
+                                self._attr_color_temp_kelvin = max(MIN_KELVIN, min(MAX_KELVIN, predicted.kelvin))
+                                self._attr_color_mode = ColorMode.COLOR_TEMP
                         _LOGGER.debug("Set scene %s (%s) for lamp %s", effect, scene_num, self._lamp_id)
                         self.async_write_ha_state()
+                        if self._api.confirm_commands and isinstance(result, LampState):
+                            self.coordinator.async_set_lamp_state(self._lamp_id, result)
                         return
                     else:
                         _LOGGER.warning("Scene number %s out of range", scene_num)
@@ -168,64 +330,82 @@ class LukeRobertsLight(LightEntity):
 
             # IMPORTANT: The Luke Roberts Cloud API does NOT work properly with combined commands.
             # Commands with multiple parameters cause unpredictable behavior (random scenes, wrong colors).
-            # SOLUTION: Send each parameter as a SEPARATE command with delays between them.
+            # SOLUTION: Send each parameter as a SEPARATE command, one after another.
             #
             # Based on extensive testing:
             # - Single parameter commands work reliably and produce reproducible results
             # - Each command must be sent TWICE (first establishes BLE connection, second reaches lamp)
             # - Use 2 second delay between the two sends
             #
+            # The commands are queued as one batch: the bridge is woken up once for the
+            # whole batch, and every following command needs a single send while it is warm.
+            # With confirm_commands, each command is sent once and confirmed by reading
+            # back the lamp state, and only resent if it did not show up.
+            #
             # OPTIMIZATION: Only send commands for parameters that actually change
-            # This reduces flickering when adjusting brightness/kelvin on an already-on lamp
+            # This reduces flickering when adjusting brightness/kelvin on an already-on lamp.
+            # After a scene whose result is not known yet, the shown values may be
+            # outdated, so they are sent regardless.
+            values_unknown = self.scenes.values_unknown
+            commands: list[dict[str, Any]] = []
+            results: list[dict[str, Any] | str] = []
+            new_brightness = self._attr_brightness
+            new_kelvin = self._attr_color_temp_kelvin
 
             # Step 1: Turn on power (only if lamp is currently off)
             if not self._attr_is_on:
-                _LOGGER.debug("Sending power ON command")
-                await self._api.send_command_reliable({"power": "ON"})
+                _LOGGER.debug("Queueing power ON command")
+                commands.append({"power": "ON"})
 
             # Step 2: Set brightness (only if it changed)
             brightness = kwargs.get(ATTR_BRIGHTNESS)
             if brightness is not None:
-                # Progressive brightness scaling for better control:
-                # - 0-70% HA (0-179): maps to 0-50% API (fine control in normal range)
-                # - 70-100% HA (179-255): maps to 50-100% API (steeper, access to full brightness)
-                # This gives fine control where needed while allowing full brightness
-
-                if brightness <= 179:  # 0-70% range
-                    # Linear mapping: 0-179 HA → 0-50 API
-                    lamp_brightness = int((brightness / 179) * 50)
-                else:  # 70-100% range
-                    # Linear mapping: 179-255 HA → 50-100 API
-                    lamp_brightness = int(50 + ((brightness - 179) / 76) * 50)
+                # Progressive brightness scaling gives fine control where needed
+                # while allowing full brightness
+                lamp_brightness = ha_to_lamp_brightness(brightness)
 
                 # Only send if brightness actually changed
-                if self._attr_brightness != brightness:
-                    _LOGGER.debug("Sending brightness command: %s (HA: %s)", lamp_brightness, brightness)
-                    await self._api.send_command_reliable({"brightness": lamp_brightness})
-                self._attr_brightness = brightness
+                if self._attr_brightness != brightness or values_unknown:
+                    _LOGGER.debug("Queueing brightness command: %s (HA: %s)", lamp_brightness, brightness)
+                    commands.append({"brightness": lamp_brightness})
+                new_brightness = brightness
             elif not self._attr_is_on:
                 # Lamp was off, set default brightness (50% HA = ~28% API)
                 lamp_brightness = 28
-                _LOGGER.debug("Sending default brightness command: %s", lamp_brightness)
-                await self._api.send_command_reliable({"brightness": lamp_brightness})
-                self._attr_brightness = 128  # 50% in HA
+                _LOGGER.debug("Queueing default brightness command: %s", lamp_brightness)
+                commands.append({"brightness": lamp_brightness})
+                new_brightness = 128  # 50% in HA
 
             # Step 3: Set color temperature (only if it changed)
             color_temp_kelvin = kwargs.get(ATTR_COLOR_TEMP_KELVIN)
             if color_temp_kelvin is not None:
                 kelvin = max(MIN_KELVIN, min(MAX_KELVIN, int(color_temp_kelvin)))
                 # Only send if kelvin actually changed
-                if self._attr_color_temp_kelvin != kelvin:
-                    _LOGGER.debug("Sending kelvin command: %s", kelvin)
-                    await self._api.send_command_reliable({"kelvin": kelvin})
-                self._attr_color_temp_kelvin = kelvin
+                if self._attr_color_temp_kelvin != kelvin or values_unknown:
+                    _LOGGER.debug("Queueing kelvin command: %s", kelvin)
+                    commands.append({"kelvin": kelvin})
+                new_kelvin = kelvin
             elif not self._attr_is_on:
                 # Lamp was off, set default kelvin
                 kelvin = 3000
-                _LOGGER.debug("Sending default kelvin command: %s", kelvin)
-                await self._api.send_command_reliable({"kelvin": kelvin})
-                self._attr_color_temp_kelvin = kelvin
-
+                _LOGGER.debug("Queueing default kelvin command: %s", kelvin)
+                commands.append({"kelvin": kelvin})
+                new_kelvin = kelvin
+
+            if commands:
+                # The outcome of these commands would be taken for the result of the last scene
+                self.scenes.cancel()
+                # Polls older than these commands must not undo them in the UI
+                self.ledger.add(commands)
+                try:
+                    results = await self._api.queue_commands(commands)
+                except Exception:
+                    self.ledger.discard(commands)
+                    raise
+                self.ledger.mark_sent(commands, results)
+
+            self._attr_brightness = new_brightness
+            self._attr_color_temp_kelvin = new_kelvin
             self._attr_is_on = True
             self._attr_color_mode = ColorMode.COLOR_TEMP
             self._attr_hs_color = None
@@ -236,84 +416,333 @@ class LukeRobertsLight(LightEntity):
             raise
 
         self.async_write_ha_state()
-
-        # Schedule immediate update after state is written
-        # This ensures UI shows correct values right after command completes
-        self.async_schedule_update_ha_state(force_refresh=True)
+        await self._async_command_done(results[-1] if results else None)
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn off the light."""
         _LOGGER.debug("Turning off light %s", self._lamp_id)
+        self._cancel_transition()
+        self.scenes.cancel()
+
+        if kwargs.get(ATTR_TRANSITION) and self._attr_is_on:
+            await self._async_start_transition(float(kwargs[ATTR_TRANSITION]), 1, None, turn_off=True)
+            return
 
         try:
             # Send power OFF command reliably (twice with delay)
-            await self._api.send_command_reliable({"power": "OFF"})
+            command = {"power": "OFF"}
+            self.ledger.add([command])
+            try:
+                result = await self._api.queue_command(command)
+            except Exception:
+                self.ledger.discard([command])
+                raise
+            self.ledger.mark_sent([command], [result])
             self._attr_is_on = False
         except Exception as err:  # noqa: BLE001
             _LOGGER.error("Error turning off light %s: %s", self._lamp_id, err)
             raise
 
         self.async_write_ha_state()
-
-        # Schedule immediate update after state is written
-        self.async_schedule_update_ha_state(force_refresh=True)
-
-    async def async_update(self) -> None:
-        """Fetch new state data for the light.
-
-        The Luke Roberts Cloud API returns state in this format:
-        {
-            "on": true,
-            "online": true,
-            "brightness": 2,
-            "color": {
-                "temperatureK": 2700
-            },
-            "updated_at": "2026-01-19T14:21:58.771Z"
-        }
+        await self._async_command_done(result)
+
+    async def _async_start_transition(
+        self,
+        duration: float,
+        brightness: int | None,
+        kelvin: int | None,
+        turn_off: bool = False,
+    ) -> None:
+        """Start fading to a HA brightness and kelvin in the background.
+
+        A lamp that is off fades from the lowest brightness. It is switched
+        on right away in one batch with the first step, so the fade stops if
+        the power-on fails instead of stepping a lamp that stayed off.
+        With turn_off, the lamp is switched off once the fade is done.
         """
-        _LOGGER.debug("Updating light state for lamp %s", self._lamp_id)
+        self.scenes.cancel()
+        start: dict[str, int] = {}
+        target: dict[str, int] = {}
+        if brightness is not None:
+            # HA brightness of lamp brightness 1 does not convert back to 1
+            start["brightness"] = (
+                max(1, ha_to_lamp_brightness(self._attr_brightness or 1)) if self._attr_is_on else 1
+            )
+            target["brightness"] = max(1, ha_to_lamp_brightness(brightness))
+        if kelvin is not None:
+            target["kelvin"] = max(MIN_KELVIN, min(MAX_KELVIN, int(kelvin)))
+            start["kelvin"] = self._attr_color_temp_kelvin or target["kelvin"]
+
+        # Lamps of the account fading at the same time share the request budget
+        lights = async_get_account(self.hass, self._api.api_token).lights.values()
+        fading = 1 + sum(light.transitioning for light in lights if light is not self)
+        interval = step_interval(self._api, len(target), fading)
+        steps = plan_transition(start, target, duration, interval)
+        if not self._attr_is_on:
+            power_on: list[dict[str, Any]] = [{"power": STATE_ON}]
+            if "brightness" not in target:
+                power_on.append({"brightness": 1})
+            first = steps[0][1] if steps else []
+            steps[:1] = [(0.0, power_on + first)]
+            self._attr_effect = None
+        _LOGGER.debug(
+            "Fading light %s to %s in %s steps over %.1f seconds", self._lamp_id, target, len(steps), duration
+        )
+        self._transition = self.hass.async_create_background_task(
+            self._async_run_transition(steps, turn_off), name=f"{DOMAIN} transition {self._lamp_id}"
+        )
 
+    async def _async_run_transition(
+        self, steps: list[tuple[float, list[dict[str, Any]]]], turn_off: bool
+    ) -> None:
+        """Send the steps of a fade and bring the state up to date afterwards."""
         try:
-            state = await self._api.get_state()
-            _LOGGER.debug("Received state for lamp %s: %s", self._lamp_id, state)
-
-            if isinstance(state, dict):
-                # Power state
-                if "on" in state:
-                    self._attr_is_on = bool(state["on"])
-
-                # Brightness: Reverse progressive scaling
-                # - 0-50% API (0-50): maps to 0-70% HA (0-179)
-                # - 50-100% API (50-100): maps to 70-100% HA (179-255)
-                if "brightness" in state:
-                    lamp_brightness = int(state["brightness"])
-                    if lamp_brightness > 0:
-                        if lamp_brightness <= 50:  # 0-50% API range
-                            # Reverse mapping: 0-50 API → 0-179 HA
-                            self._attr_brightness = int((lamp_brightness / 50) * 179)
-                        else:  # 50-100% API range
-                            # Reverse mapping: 50-100 API → 179-255 HA
-                            self._attr_brightness = int(179 + ((lamp_brightness - 50) / 50) * 76)
-
-                        # Ensure minimum brightness of 1 in HA (0 means off)
-                        if self._attr_brightness == 0:
-                            self._attr_brightness = 1
-                        # Cap at 255 just in case
-                        if self._attr_brightness > 255:
-                            self._attr_brightness = 255
-
-                # Color temperature
-                if "color" in state and isinstance(state["color"], dict):
-                    if "temperatureK" in state["color"]:
-                        kelvin = int(state["color"]["temperatureK"])
-                        # Clamp to supported range
-                        self._attr_color_temp_kelvin = max(MIN_KELVIN, min(MAX_KELVIN, kelvin))
-                        self._attr_color_mode = ColorMode.COLOR_TEMP
-
-                # Log if lamp is offline
-                if "online" in state and not state["online"]:
-                    _LOGGER.warning("Lamp %s is offline", self._lamp_id)
-
+            result = await async_run_transition(self._api, steps, self._transition_step)
+            if turn_off:
+                result = await self._api.queue_command({"power": STATE_OFF})
+                self._attr_is_on = False
+                self.async_write_ha_state()
+        except asyncio.CancelledError:
+            _LOGGER.debug("Transition of light %s stopped by a newer command", self._lamp_id)
+            raise
         except Exception as err:  # noqa: BLE001
-            _LOGGER.error("Error updating light state for lamp %s: %s", self._lamp_id, err)
+            _LOGGER.error("Error during transition of light %s: %s", self._lamp_id, err)
+            return
+        await self._async_command_done(result)
+
+    @callback
+    def _transition_step(self, commands: list[dict[str, Any]]) -> None:
+        """Show the values of a fade step that was sent."""
+        self.ledger.add(commands)
+        self.ledger.mark_sent(commands)
+        for command in commands:
+            if "power" in command:
+                self._attr_is_on = command["power"] == STATE_ON
+            if "brightness" in command:
+                self._attr_brightness = lamp_to_ha_brightness(command["brightness"])
+            if "kelvin" in command:
+                self._attr_color_temp_kelvin = command["kelvin"]
+        self.async_write_ha_state()
+
+    def _cancel_transition(self) -> None:
+        """Stop a running fade, its last step in flight is superseded by newer commands."""
+        if self._transition is not None and not self._transition.done():
+            self._transition.cancel()
+        self._transition = None
+
+    async def _async_command_done(self, result: dict[str, Any] | str | LampState | None) -> None:
+        """Bring the account state up to date after commands were sent."""
+        if result is BUFFERED_RESULT:
+            # The lamp is offline, the commands are sent once it is back
+            return
+        if self._api.confirm_commands:
+            # The lamp state confirming the command was just read back, no poll needed
+            if isinstance(result, LampState):
+                self.coordinator.async_set_lamp_state(self._lamp_id, result)
+            return
+
+        # Request a refresh after state is written
+        # This ensures UI shows correct values right after command completes.
+        # Refresh requests are debounced, so commands to several lamps share one poll,
+        # and it runs in the background so the service call does not wait for it.
+        # The commanded lamp is polled fast for a while so the UI settles on the final state.
+        # With push updates, the change arrives by itself once the lamp applied it.
+        if self.coordinator.push_active:
+            return
+        self.coordinator.async_note_command(self._lamp_id)
+        self.hass.async_create_task(self.coordinator.async_request_refresh())
+
+    async def async_prewarm(self) -> None:
+        """Wake the BLE bridge so the next command needs a single send."""
+        _LOGGER.debug("Prewarming bridge of lamp %s", self._lamp_id)
+        await self._api.prewarm()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator.
+
+        Polls that neither changed this lamp nor flipped its availability
+        are skipped, unless the light shows something else than the lamp
+        state, e.g. optimistic values of a command the lamp never applied,
+        or commands are pending whose ledger entries have to settle.
+        """
+        restored, self._restored = self._restored, False
+        available = self.available
+        if (
+            not restored
+            and available == self._was_available
+            and not self.coordinator.lamp_changed(self._lamp_id)
+            and not self.ledger.pending_kinds
+            and (not available or self._shows_state(self.coordinator.data[self._lamp_id]))
+        ):
+            return
+        self._was_available = available
+
+        if available:
+            self._apply_state(self.coordinator.data[self._lamp_id])
+        self.async_write_ha_state()
+
+    def _shows_state(self, state: LampState) -> bool:
+        """Return if the light already shows what applying a lamp state would set."""
+        if state.on is not None and self._attr_is_on != state.on:
+            return False
+        if state.brightness and self._attr_brightness != lamp_to_ha_brightness(state.brightness):
+            return False
+        if state.kelvin is not None and self._attr_color_temp_kelvin != max(
+            MIN_KELVIN, min(MAX_KELVIN, state.kelvin)
+        ):
+            return False
+        return True
+
+    def _restore_state(self, state: str, attributes: Mapping[str, Any]) -> None:
+        """Apply the state of the light from before a restart."""
+        _LOGGER.debug("Restoring state of lamp %s: %s", self._lamp_id, state)
+        self._restored = True
+        self._attr_is_on = state == HA_STATE_ON
+        if (brightness := attributes.get(ATTR_BRIGHTNESS)) is not None:
+            self._attr_brightness = brightness
+        if (kelvin := attributes.get(ATTR_COLOR_TEMP_KELVIN)) is not None:
+            self._attr_color_temp_kelvin = kelvin
+        effect = attributes.get(ATTR_EFFECT)
+        if effect in self._scene_name_to_num:
+            self._attr_effect = effect
+
+    def _apply_state(self, state: LampState) -> None:
+        """Apply a lamp state from the cloud to the entity."""
+        _LOGGER.debug("Received state for lamp %s: %s", self._lamp_id, state)
+
+        # A state showing the result of the last scene teaches what it sets
+        self.scenes.observe(state)
+
+        # Values older than a pending command keep the optimistic state
+        stale = self.ledger.stale_kinds(state)
+        if stale:
+            _LOGGER.debug("Ignoring stale %s of lamp %s", ", ".join(sorted(stale)), self._lamp_id)
+
+        # Power state
+        if state.on is not None and "power" not in stale:
+            self._attr_is_on = state.on
+
+        # Brightness: Reverse progressive scaling
+        if state.brightness and "brightness" not in stale:
+            self._attr_brightness = lamp_to_ha_brightness(state.brightness)
+
+        # Color temperature, clamped to the supported range
+        if state.kelvin is not None and "kelvin" not in stale:
+            self._attr_color_temp_kelvin = max(MIN_KELVIN, min(MAX_KELVIN, state.kelvin))
+            self._attr_color_mode = ColorMode.COLOR_TEMP
+
+        # Log if lamp is offline
+        if not state.reachable:
+            _LOGGER.warning("Lamp %s is offline", self._lamp_id)
+
+
+class LukeRobertsGroupLight(CoordinatorEntity[LukeRobertsCoordinator], LightEntity):
+    """Several Luke Roberts lamps of one account controlled as one light.
+
+    Commands are fanned out to the light entities of all members at once,
+    so the bridges of all members wake up together and the whole group
+    waits for a single wake-up delay instead of one per lamp.
+    """
+
+    _attr_supported_color_modes = {ColorMode.COLOR_TEMP}
+    _attr_color_mode = ColorMode.COLOR_TEMP
+    _attr_supported_features = LightEntityFeature.TRANSITION
+    _attr_min_color_temp_kelvin = MIN_KELVIN
+    _attr_max_color_temp_kelvin = MAX_KELVIN
+
+    def __init__(
+        self,
+        coordinator: LukeRobertsCoordinator,
+        account: LukeRobertsAccount,
+        device_name: str,
+        lamp_id: int,
+        lamp_ids: list[int],
+    ) -> None:
+        """Initialize the group of lamp_ids, set up by the entry of lamp_id."""
+        super().__init__(coordinator)
+        self._account = account
+        self._lamp_ids = lamp_ids
+        self._attr_name = f"{device_name} group"
+        self._attr_unique_id = f"luke_roberts_{lamp_id}_group"
+        self._attr_extra_state_attributes = {"lamp_ids": lamp_ids}
+
+    def _member_states(self) -> list[LampState]:
+        """Return the last known states of the members."""
+        data = self.coordinator.data or {}
+        return [data[lamp_id] for lamp_id in self._lamp_ids if lamp_id in data]
+
+    @property
+    def available(self) -> bool:
+        """Return if any member was part of the last successful update."""
+        return super().available and bool(self._member_states())
+
+    @property
+    def is_on(self) -> bool:
+        """Return if any member is on."""
+        return any(state.on for state in self._member_states())
+
+    @property
+    def brightness(self) -> int | None:
+        """Return the highest brightness of the members that are on."""
+        values = [
+            lamp_to_ha_brightness(state.brightness)
+            for state in self._member_states()
+            if state.on and state.brightness
+        ]
+        return max(values, default=None)
+
+    @property
+    def color_temp_kelvin(self) -> int | None:
+        """Return the color temperature of the first member that is on."""
+        for state in self._member_states():
+            if state.on and state.kelvin is not None:
+                return max(MIN_KELVIN, min(MAX_KELVIN, state.kelvin))
+        return None
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only if a member changed."""
+        if any(self.coordinator.lamp_changed(lamp_id) for lamp_id in self._lamp_ids):
+            self.async_write_ha_state()
+
+    async def async_turn_on(self, **kwargs: Any) -> None:
+        """Turn on all members."""
+        await self._async_fan_out(lambda light: light.async_turn_on(**kwargs))
+
+    async def async_turn_off(self, **kwargs: Any) -> None:
+        """Turn off all members."""
+        await self._async_fan_out(lambda light: light.async_turn_off(**kwargs))
+
+    async def async_prewarm(self) -> None:
+        """Wake the bridges of all members so their next commands need a single send."""
+        lights = [
+            self._account.lights[lamp_id] for lamp_id in self._lamp_ids if lamp_id in self._account.lights
+        ]
+        results = await asyncio.gather(*(light.async_prewarm() for light in lights), return_exceptions=True)
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors and len(errors) == len(lights):
+            raise errors[0]
+
+    async def _async_fan_out(self, command: Callable[[LukeRobertsLight], Awaitable[None]]) -> None:
+        """Run a command on the light entities of all members concurrently."""
+        lights = [
+            self._account.lights[lamp_id] for lamp_id in self._lamp_ids if lamp_id in self._account.lights
+        ]
+        if not lights:
+            return
+
+        semaphore = asyncio.Semaphore(GROUP_CONCURRENCY)
+
+        async def run(light: LukeRobertsLight) -> None:
+            async with semaphore:
+                await command(light)
+
+        results = await asyncio.gather(*(run(light) for light in lights), return_exceptions=True)
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if len(errors) == len(lights):
+            raise errors[0]
+        if errors:
+            _LOGGER.warning(
+                "%s of %s lamps of %s did not respond: %s", len(errors), len(lights), self.name, errors[0]
+            )
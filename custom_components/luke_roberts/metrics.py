@@ -0,0 +1,154 @@
+"""Request and command metrics for the Luke Roberts Cloud API client."""
+from __future__ import annotations
+
+from typing import Any
+
+# Upper bounds of the latency histogram buckets in seconds
+LATENCY_BUCKETS: tuple[float, ...] = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+OUTCOME_OK = "ok"
+OUTCOME_ERROR = "error"
+OUTCOME_TIMEOUT = "timeout"
+
+
+class LatencyStats:
+    """Count and latency histogram of one kind of operation."""
+
+    __slots__ = ("count", "errors", "timeouts", "total", "max", "last", "buckets")
+
+    def __init__(self) -> None:
+        """Initialize empty stats."""
+        self.count = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last: float | None = None
+        # One counter per bucket plus one for everything above the last bound
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def record(self, latency: float, outcome: str = OUTCOME_OK) -> None:
+        """Record one operation."""
+        self.count += 1
+        if outcome == OUTCOME_ERROR:
+            self.errors += 1
+        elif outcome == OUTCOME_TIMEOUT:
+            self.timeouts += 1
+
+        self.total += latency
+        self.last = latency
+        if latency > self.max:
+            self.max = latency
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if latency <= bound:
+                self.buckets[index] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def merge(self, other: LatencyStats) -> None:
+        """Add the counts of other stats to these."""
+        self.count += other.count
+        self.errors += other.errors
+        self.timeouts += other.timeouts
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        if other.last is not None:
+            self.last = other.last
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+
+    @property
+    def average(self) -> float | None:
+        """Return the mean latency in seconds."""
+        return self.total / self.count if self.count else None
+
+    def percentile(self, fraction: float) -> float | None:
+        """Estimate a latency percentile from the histogram.
+
+        Returns the upper bound of the bucket containing the percentile, or
+        the maximum seen latency for the overflow bucket.
+        """
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for index, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= rank:
+                return LATENCY_BUCKETS[index] if index < len(LATENCY_BUCKETS) else self.max
+        return self.max
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the stats as a JSON serializable dict."""
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "average": self.average,
+            "p50": self.percentile(0.5),
+            "p99": self.percentile(0.99),
+            "max": self.max,
+            "last": self.last,
+            "histogram": {
+                **{f"le_{bound}": count for bound, count in zip(LATENCY_BUCKETS, self.buckets)},
+                "inf": self.buckets[-1],
+            },
+        }
+
+
+class ApiMetrics:
+    """Metrics of an API client, per endpoint and for whole commands.
+
+    Endpoints are keyed by their template (e.g. ENDPOINT_LAMP_STATE), so the
+    metrics of all lamps can be merged per account.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty metrics."""
+        self.endpoints: dict[str, LatencyStats] = {}
+        # Time from queueing a command until the lamp accepted its final send
+        self.commands = LatencyStats()
+        # State reads answered from the cache or by joining a read in flight
+        self.state_cache_hits = 0
+        self.state_reads_joined = 0
+
+    def record_request(self, endpoint: str, latency: float, outcome: str) -> None:
+        """Record one HTTP request."""
+        stats = self.endpoints.get(endpoint)
+        if stats is None:
+            stats = self.endpoints[endpoint] = LatencyStats()
+        stats.record(latency, outcome)
+
+    def record_command(self, latency: float, outcome: str = OUTCOME_OK) -> None:
+        """Record one command from queueing to confirmation."""
+        self.commands.record(latency, outcome)
+
+    @property
+    def requests(self) -> LatencyStats:
+        """Return the stats of all endpoints combined."""
+        total = LatencyStats()
+        for stats in self.endpoints.values():
+            total.merge(stats)
+        return total
+
+    @classmethod
+    def merged(cls, metrics: list[ApiMetrics]) -> ApiMetrics:
+        """Return the combined metrics of several clients, e.g. one account."""
+        result = cls()
+        for item in metrics:
+            for endpoint, stats in item.endpoints.items():
+                result.endpoints.setdefault(endpoint, LatencyStats()).merge(stats)
+            result.commands.merge(item.commands)
+            result.state_cache_hits += item.state_cache_hits
+            result.state_reads_joined += item.state_reads_joined
+        return result
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics as a JSON serializable dict."""
+        return {
+            "requests": self.requests.as_dict(),
+            "endpoints": {endpoint: stats.as_dict() for endpoint, stats in self.endpoints.items()},
+            "commands": self.commands.as_dict(),
+            "state_cache_hits": self.state_cache_hits,
+            "state_reads_joined": self.state_reads_joined,
+        }
@@ -0,0 +1,81 @@
+"""Data models for the Luke Roberts integration."""
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - Home Assistant ships orjson
+    orjson = None
+
+
+def decode_json(body: bytes) -> Any:
+    """Decode a JSON response body, with orjson when it is available.
+
+    Raises:
+        ValueError: If the body is not valid JSON
+    """
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def _int_or_none(value: Any) -> int | None:
+    """Return a value as int, or None if it is missing or not a number."""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True, slots=True)
+class LampState:
+    """State of a lamp as reported by the cloud.
+
+    Fields the cloud did not report are None. States compare equal when all
+    fields match, so an unchanged lamp is detected with a single comparison.
+    The cloud reports state in this format:
+    {
+        "on": true,
+        "online": true,
+        "brightness": 2,
+        "color": {
+            "temperatureK": 2700
+        },
+        "updated_at": "2026-01-19T14:21:58.771Z"
+    }
+    """
+
+    on: bool | None = None
+    online: bool | None = None
+    brightness: int | None = None
+    kelvin: int | None = None
+    updated_at: str | None = None
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> LampState:
+        """Build the state from a decoded state payload in one pass."""
+        on = data.get("on")
+        online = data.get("online")
+        color = data.get("color")
+        updated_at = data.get("updated_at")
+        return cls(
+            on=bool(on) if on is not None else None,
+            online=bool(online) if online is not None else None,
+            brightness=_int_or_none(data.get("brightness")),
+            kelvin=_int_or_none(color.get("temperatureK")) if isinstance(color, dict) else None,
+            updated_at=updated_at if isinstance(updated_at, str) else None,
+        )
+
+    @property
+    def reachable(self) -> bool:
+        """Return if the lamp is not reported offline."""
+        return self.online is not False
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state as a JSON serializable dict."""
+        return asdict(self)
@@ -0,0 +1,93 @@
+"""Poll scheduling shared by all Luke Roberts accounts."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import random
+from typing import Any, TypeVar
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    DATA_POLL_SCHEDULER,
+    DOMAIN,
+    POLL_JITTER,
+    POLL_MAX_IN_FLIGHT,
+    POLL_SPREAD_MAX,
+    POLL_SPREAD_SHARE,
+)
+
+_T = TypeVar("_T")
+
+
+class PollScheduler:
+    """Spread the state polls of all accounts over time.
+
+    Without it every lamp is polled at the same moment each interval, and
+    all accounts set up together keep polling in lockstep. That gives a
+    burst of requests, and with it latency spikes, timeouts and 429s, once
+    per interval. Instead:
+
+    - the lamp polls of an account are spread evenly over a window of
+      POLL_SPREAD_SHARE of the interval, each at a random time within its
+      own slot
+    - poll intervals vary at random by POLL_JITTER, so accounts drift apart
+    - at most POLL_MAX_IN_FLIGHT polls are sent at once, across all accounts
+    """
+
+    def __init__(self, max_in_flight: int = POLL_MAX_IN_FLIGHT) -> None:
+        """Initialize the scheduler."""
+        self.max_in_flight = max_in_flight
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._random = random.Random()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.polls = 0
+
+    @staticmethod
+    def spread_window(interval: float) -> float:
+        """Return the seconds the lamp polls of an account are spread over."""
+        return min(POLL_SPREAD_MAX, interval * POLL_SPREAD_SHARE)
+
+    def offsets(self, count: int, window: float) -> list[float]:
+        """Return a start offset for each of count polls, one per equal slot of the window."""
+        if count <= 0:
+            return []
+        slot = window / count
+        return [(index + self._random.random()) * slot for index in range(count)]
+
+    def jitter(self, interval: float) -> float:
+        """Return the interval varied at random by up to POLL_JITTER."""
+        return interval * self._random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER)
+
+    async def async_poll(self, fetch: Callable[[], Awaitable[_T]], delay: float = 0.0) -> _T:
+        """Wait delay seconds and a free slot, then run a poll."""
+        if delay > 0:
+            await asyncio.sleep(delay)
+        async with self._in_flight:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            self.polls += 1
+            try:
+                return await fetch()
+            finally:
+                self.in_flight -= 1
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the scheduler state as a JSON serializable dict."""
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "polls": self.polls,
+        }
+
+
+@callback
+def async_get_poll_scheduler(hass: HomeAssistant) -> PollScheduler:
+    """Return the poll scheduler shared by all accounts, creating it if needed."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    scheduler: PollScheduler | None = domain_data.get(DATA_POLL_SCHEDULER)
+    if scheduler is None:
+        scheduler = domain_data[DATA_POLL_SCHEDULER] = PollScheduler()
+    return scheduler
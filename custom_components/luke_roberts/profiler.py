@@ -0,0 +1,188 @@
+"""On-demand profiling of the hot paths of the Luke Roberts integration."""
+from __future__ import annotations
+
+import asyncio
+import cProfile
+from datetime import datetime
+import io
+import logging
+import os
+import pstats
+import time
+import tracemalloc
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import DOMAIN, PROFILE_LAG_INTERVAL, PROFILE_TOP_ENTRIES
+
+_LOGGER = logging.getLogger(__name__)
+
+# Functions always listed in the report, if they ran
+HOT_PATHS = (
+    "_request",
+    "_send_request",
+    "send_command_reliable",
+    "queue_command",
+    "queue_commands",
+    "_async_run",
+    "_async_update_data",
+    "async_turn_on",
+    "async_turn_off",
+    "_handle_coordinator_update",
+    "_apply_state",
+)
+
+_INTEGRATION_DIR = os.path.dirname(__file__)
+
+
+class LoopLagMonitor:
+    """Measure how long the event loop is blocked.
+
+    Sleeps for PROFILE_LAG_INTERVAL again and again. Any time a sleep
+    returns later than asked for, something kept the loop busy.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the monitor."""
+        self.samples = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.stalls = 0  # Lags above ten times the sample interval
+
+    async def async_run(self) -> None:
+        """Sample the loop lag until cancelled."""
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(PROFILE_LAG_INTERVAL)
+            lag = max(0.0, time.monotonic() - start - PROFILE_LAG_INTERVAL)
+            self.samples += 1
+            self.total += lag
+            self.max = max(self.max, lag)
+            if lag > PROFILE_LAG_INTERVAL * 10:
+                self.stalls += 1
+
+
+class Profiler:
+    """Profile the integration for a while and write a report file.
+
+    cProfile covers the whole event loop thread while it runs, the report
+    only lists functions of this integration. Coroutines count one call per
+    resumption, so their time is the time they kept the event loop busy.
+    tracemalloc is optional since it slows down every allocation.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the profiler."""
+        self.hass = hass
+        self._running = False
+
+    async def async_profile(self, duration: float, memory: bool) -> str:
+        """Profile for duration seconds and return the path of the report."""
+        if self._running:
+            raise HomeAssistantError("Profiling is already running")
+        self._running = True
+        try:
+            return await self._async_profile(duration, memory)
+        finally:
+            self._running = False
+
+    async def _async_profile(self, duration: float, memory: bool) -> str:
+        """Profile for duration seconds and return the path of the report."""
+        monitor = LoopLagMonitor()
+        lag_task = self.hass.async_create_background_task(
+            monitor.async_run(), name=f"{DOMAIN} loop lag monitor"
+        )
+        started_tracing = memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        # Snapshots and the report take long enough to show up as loop blocking themselves
+        before = await self.hass.async_add_executor_job(tracemalloc.take_snapshot) if memory else None
+
+        _LOGGER.info("Profiling Luke Roberts integration for %s seconds", duration)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as err:
+            # Only one profiler can run at a time, e.g. not next to the profiler integration
+            lag_task.cancel()
+            if started_tracing:
+                tracemalloc.stop()
+            raise HomeAssistantError(f"Cannot start profiling: {err}") from err
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            profile.disable()
+            lag_task.cancel()
+            try:
+                after = await self.hass.async_add_executor_job(tracemalloc.take_snapshot) if memory else None
+            finally:
+                if started_tracing:
+                    tracemalloc.stop()
+
+        report = await self.hass.async_add_executor_job(_format_report, duration, profile, monitor, before, after)
+        path = self.hass.config.path(f"{DOMAIN}_profile_{datetime.now():%Y%m%d_%H%M%S}.txt")
+        await self.hass.async_add_executor_job(_write_report, path, report)
+        _LOGGER.info("Profile written to %s", path)
+        return path
+
+
+def _format_report(
+    duration: float,
+    profile: cProfile.Profile,
+    monitor: LoopLagMonitor,
+    before: tracemalloc.Snapshot | None,
+    after: tracemalloc.Snapshot | None,
+) -> str:
+    """Return the text of a profiling report."""
+    out = io.StringIO()
+    out.write(f"Luke Roberts profile over {duration:.0f} seconds\n\n")
+
+    out.write("== Event loop blocking ==\n")
+    average = monitor.total / monitor.samples if monitor.samples else 0.0
+    out.write(
+        f"samples {monitor.samples}  total {monitor.total * 1000:.1f} ms  "
+        f"average {average * 1000:.2f} ms  max {monitor.max * 1000:.1f} ms  "
+        f"stalls >{PROFILE_LAG_INTERVAL * 10 * 1000:.0f} ms {monitor.stalls}\n\n"
+    )
+
+    stats = pstats.Stats(profile)
+    rows = [
+        (func, call_count, tottime, cumtime)
+        for func, (_, call_count, tottime, cumtime, _) in stats.stats.items()  # type: ignore[attr-defined]
+        if func[0].startswith(_INTEGRATION_DIR) and func[0] != __file__
+    ]
+    header = f"{'calls':>8} {'own ms':>10} {'cum ms':>10} {'ms/call':>9}  function\n"
+
+    def write_rows(selected: list[tuple]) -> None:
+        out.write(header)
+        for (filename, line, name), call_count, tottime, cumtime in selected:
+            per_call = cumtime / call_count * 1000 if call_count else 0.0
+            out.write(
+                f"{call_count:>8} {tottime * 1000:>10.2f} {cumtime * 1000:>10.2f} {per_call:>9.3f}  "
+                f"{name} ({os.path.basename(filename)}:{line})\n"
+            )
+        out.write("\n")
+
+    out.write("== Hot paths (cumulative time on the event loop) ==\n")
+    write_rows(sorted((row for row in rows if row[0][2] in HOT_PATHS), key=lambda row: -row[3]))
+    out.write(f"== Top {PROFILE_TOP_ENTRIES} functions of the integration by own time ==\n")
+    write_rows(sorted(rows, key=lambda row: -row[2])[:PROFILE_TOP_ENTRIES])
+
+    if before is not None and after is not None:
+        out.write(f"== Top {PROFILE_TOP_ENTRIES} allocations of the integration ==\n")
+        only_integration = [tracemalloc.Filter(True, os.path.join(_INTEGRATION_DIR, "*"))]
+        differences = after.filter_traces(only_integration).compare_to(
+            before.filter_traces(only_integration), "lineno"
+        )
+        for difference in differences[:PROFILE_TOP_ENTRIES]:
+            out.write(f"{difference}\n")
+        out.write("\n")
+
+    return out.getvalue()
+
+
+def _write_report(path: str, report: str) -> None:
+    """Write a report file."""
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(report)
@@ -0,0 +1,116 @@
+"""Request rate limiting for the Luke Roberts Cloud API client."""
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+import logging
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+# Priority lanes, served in this order
+PRIORITY_HIGH = 0  # User-facing commands
+PRIORITY_LOW = 1  # Background polls
+
+
+class RateLimiter:
+    """Token bucket shared by all API clients of one account.
+
+    Requests wait in one of two lanes. Waiting high-priority requests always
+    get the next token before low-priority ones. Low-priority requests also
+    leave a reserve of tokens untouched, so a user command arriving while
+    polls saturate the budget is sent right away.
+
+    A 429 response blocks the whole bucket for its Retry-After time.
+    """
+
+    def __init__(self, rate: float, burst: int, reserve: int = 1) -> None:
+        """Initialize the limiter.
+
+        Args:
+            rate: Tokens added per second
+            burst: Maximum number of tokens in the bucket
+            reserve: Tokens that only high-priority requests may use
+        """
+        self._rate = rate
+        self._capacity = float(burst)
+        self._reserve = min(reserve, burst - 1)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lanes: tuple[deque[asyncio.Future], ...] = (deque(), deque())
+        self._wakeup: asyncio.TimerHandle | None = None
+
+    @property
+    def blocked_for(self) -> float:
+        """Return the seconds until a Retry-After block ends."""
+        return max(0.0, self._blocked_until - time.monotonic())
+
+    async def acquire(self, priority: int = PRIORITY_LOW) -> None:
+        """Wait until a request of the given priority may be sent."""
+        if not any(self._lanes[lane] for lane in range(priority + 1)) and self._take(priority):
+            return
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._lanes[priority].append(future)
+        self._schedule()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The token was granted after all, hand it to the next waiter
+                self._tokens = min(self._capacity, self._tokens + 1)
+                self._dispatch()
+            else:
+                self._lanes[priority].remove(future)
+            raise
+
+    def block(self, seconds: float) -> None:
+        """Hold back all requests for the given time, e.g. after a 429."""
+        until = time.monotonic() + seconds
+        if until > self._blocked_until:
+            _LOGGER.debug("Rate limited by the cloud, pausing requests for %.1f seconds", seconds)
+            self._blocked_until = until
+            self._tokens = 0.0
+            self._updated = until
+        self._schedule()
+
+    def _refill(self) -> None:
+        """Add the tokens earned since the last refill."""
+        now = time.monotonic()
+        if now > self._updated:
+            self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+
+    def _take(self, priority: int) -> bool:
+        """Take a token if one is available to the priority."""
+        if time.monotonic() < self._blocked_until:
+            return False
+        self._refill()
+        needed = 1 + (self._reserve if priority == PRIORITY_LOW else 0)
+        if self._tokens >= needed:
+            self._tokens -= 1
+            return True
+        return False
+
+    def _dispatch(self) -> None:
+        """Hand out tokens to waiting requests, high priority first."""
+        self._wakeup = None
+        for priority, lane in enumerate(self._lanes):
+            while lane:
+                if lane[0].done():
+                    lane.popleft()
+                    continue
+                if not self._take(priority):
+                    self._schedule()
+                    return
+                lane.popleft().set_result(None)
+
+    def _schedule(self) -> None:
+        """Wake up when the next waiting request can get a token."""
+        if self._wakeup is not None or not any(self._lanes):
+            return
+        self._refill()
+        needed = 1 + (self._reserve if not self._lanes[PRIORITY_HIGH] else 0)
+        delay = max(self.blocked_for, (needed - self._tokens) / self._rate, 0.0)
+        self._wakeup = asyncio.get_running_loop().call_later(delay, self._dispatch)
@@ -0,0 +1,144 @@
+"""Record the cloud traffic of API clients for offline replay.
+
+A trace is a gzip-compressed file of JSON lines. The first line is a
+header, every other line one of:
+
+- a request: {"k": "req", "t": offset, "lamp": id, "m": method,
+  "e": endpoint template, "b": request body, "s": HTTP status or "timeout"
+  or "error", "r": response body, "d": latency}
+- a command batch queued by the light: {"k": "cmd", "t": offset, "lamp": id,
+  "c": commands, "d": seconds until it was sent, "ok": success}
+
+Offsets and latencies are in seconds. Headers are never recorded and the
+API token is redacted wherever it shows up.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import datetime, timezone
+import gzip
+import json
+import time
+from typing import Any
+
+from .models import decode_json
+
+TRACE_VERSION = 1
+REDACTED = "**REDACTED**"
+
+
+def _dumps(record: dict[str, Any]) -> str:
+    """Serialize a record compactly."""
+    return json.dumps(record, separators=(",", ":"), default=str)
+
+
+class TrafficRecorder:
+    """Collect the requests and queued commands of API clients as a trace.
+
+    Records are serialized as they come in, so later changes to request or
+    response objects do not leak into the trace. At most max_records are
+    kept, later ones are counted as dropped.
+    """
+
+    def __init__(self, secrets: Iterable[str] = (), max_records: int = 100_000) -> None:
+        """Initialize the recorder, secrets are redacted from every record."""
+        self._secrets = [secret for secret in secrets if secret]
+        self._max_records = max_records
+        self._start = time.monotonic()
+        self._started_at = datetime.now(timezone.utc).isoformat()
+        self._lines: list[str] = []
+        self.dropped = 0
+
+    def _add(self, record: dict[str, Any]) -> None:
+        """Serialize, redact and keep a record."""
+        if len(self._lines) >= self._max_records:
+            self.dropped += 1
+            return
+        line = _dumps(record)
+        for secret in self._secrets:
+            line = line.replace(secret, REDACTED)
+        self._lines.append(line)
+
+    def offset(self, monotonic: float) -> float:
+        """Return the trace offset of a monotonic time."""
+        return round(monotonic - self._start, 4)
+
+    def record_request(
+        self,
+        lamp_id: int,
+        method: str,
+        endpoint: str,
+        body: dict[str, Any] | None,
+        status: int | str,
+        response: bytes | None,
+        started: float,
+    ) -> None:
+        """Record one HTTP request that started at the monotonic time started."""
+        decoded: Any = None
+        if response:
+            try:
+                decoded = decode_json(response)
+            except ValueError:
+                decoded = response.decode("utf-8", errors="replace")
+        self._add(
+            {
+                "k": "req",
+                "t": self.offset(started),
+                "lamp": lamp_id,
+                "m": method,
+                "e": endpoint,
+                "b": body,
+                "s": status,
+                "r": decoded,
+                "d": round(time.monotonic() - started, 4),
+            }
+        )
+
+    def record_commands(
+        self, lamp_id: int, commands: list[dict[str, Any]], started: float, ok: bool
+    ) -> None:
+        """Record a command batch queued at the monotonic time started."""
+        self._add(
+            {
+                "k": "cmd",
+                "t": self.offset(started),
+                "lamp": lamp_id,
+                "c": commands,
+                "d": round(time.monotonic() - started, 4),
+                "ok": ok,
+            }
+        )
+
+    @property
+    def records(self) -> int:
+        """Return the number of records kept."""
+        return len(self._lines)
+
+    def dumps(self) -> bytes:
+        """Return the trace as compressed bytes."""
+        header = _dumps(
+            {
+                "version": TRACE_VERSION,
+                "started": self._started_at,
+                "duration": self.offset(time.monotonic()),
+                "dropped": self.dropped,
+            }
+        )
+        return gzip.compress("\n".join([header, *self._lines]).encode() + b"\n")
+
+    def write(self, path: str) -> None:
+        """Write the trace to a file, blocking."""
+        with open(path, "wb") as file:
+            file.write(self.dumps())
+
+
+def load_trace(path: str) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+    """Read a trace file and return its header and records, blocking."""
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        lines = [line for line in file if line.strip()]
+    if not lines:
+        raise ValueError(f"Empty trace: {path}")
+    header = json.loads(lines[0])
+    if header.get("version") != TRACE_VERSION:
+        raise ValueError(f"Unsupported trace version: {header.get('version')}")
+    return header, [json.loads(line) for line in lines[1:]]
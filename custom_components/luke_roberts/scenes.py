@@ -0,0 +1,185 @@
+"""Learned results of the scenes of each lamp."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from datetime import datetime
+import logging
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+import homeassistant.util.dt as dt_util
+
+from .const import (
+    DATA_SCENE_STATES,
+    DOMAIN,
+    SCENE_LEARN_DELAY,
+    SCENE_LEARN_TIMEOUT,
+    STORAGE_KEY_SCENE_STATES,
+    STORAGE_SAVE_DELAY,
+    STORAGE_VERSION,
+)
+from .models import LampState
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class _SceneActivation:
+    """A scene sent to the lamp whose result no state has shown yet."""
+
+    __slots__ = ("scene", "queued_at", "sent_at", "expires")
+
+    def __init__(self, scene: int) -> None:
+        """Initialize the activation of a scene that was just queued."""
+        self.scene = scene
+        # Wall-clock time it was queued, monotonic time the cloud accepted it
+        self.queued_at: datetime = dt_util.utcnow()
+        self.sent_at: float | None = None
+        self.expires = time.monotonic() + SCENE_LEARN_TIMEOUT
+
+
+class LampScenes:
+    """Brightness and color temperature each scene of a lamp ended up at.
+
+    The state does not name the scene, so after a scene is activated the
+    first state that changed since then is taken as its result. States
+    without a timestamp count once SCENE_LEARN_DELAY passed after the send.
+    Any other command to the lamp stops the wait, its outcome would mix in.
+    """
+
+    def __init__(
+        self,
+        scenes: dict[int, LampState] | None = None,
+        on_change: Callable[[], None] | None = None,
+    ) -> None:
+        """Initialize with known scene results, on_change is called when one was learned."""
+        self._scenes: dict[int, LampState] = scenes or {}
+        self._activation: _SceneActivation | None = None
+        self._on_change = on_change
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any], on_change: Callable[[], None] | None = None) -> LampScenes:
+        """Restore scene results saved with as_dict."""
+        scenes: dict[int, LampState] = {}
+        for scene, values in data.items():
+            try:
+                scenes[int(scene)] = LampState(
+                    on=True, brightness=values.get("brightness"), kelvin=values.get("kelvin")
+                )
+            except (AttributeError, ValueError):
+                continue
+        return cls(scenes, on_change)
+
+    def predict(self, scene: int) -> LampState | None:
+        """Return the state a scene is expected to set, if it was seen before."""
+        return self._scenes.get(scene)
+
+    @property
+    def values_unknown(self) -> bool:
+        """Return if a scene without known result was activated and no state showed it yet."""
+        activation = self._activation
+        return activation is not None and activation.scene not in self._scenes
+
+    def activate(self, scene: int) -> None:
+        """Note that a scene was queued and wait for a state showing its result."""
+        self._activation = _SceneActivation(scene) if scene else None
+
+    def mark_sent(self) -> None:
+        """Note that the cloud accepted the scene."""
+        if self._activation is not None:
+            self._activation.sent_at = time.monotonic()
+
+    def cancel(self) -> None:
+        """Stop waiting for the result of the last scene, e.g. as another command followed."""
+        self._activation = None
+
+    def observe(self, state: LampState) -> None:
+        """Learn the result of the last scene from a state, if it shows it."""
+        activation = self._activation
+        if activation is None:
+            return
+        now = time.monotonic()
+        if now >= activation.expires:
+            self._activation = None
+            return
+        if activation.sent_at is None or state.on is not True:
+            return
+        if state.updated_at is not None:
+            updated = dt_util.parse_datetime(state.updated_at)
+            if updated is None or updated <= activation.queued_at:
+                return
+        elif now < activation.sent_at + SCENE_LEARN_DELAY:
+            return
+
+        self._activation = None
+        if state.brightness is None and state.kelvin is None:
+            return
+        result = LampState(on=True, brightness=state.brightness, kelvin=state.kelvin)
+        if self._scenes.get(activation.scene) == result:
+            return
+        _LOGGER.debug("Scene %s sets brightness %s and %s K", activation.scene, state.brightness, state.kelvin)
+        self._scenes[activation.scene] = result
+        if self._on_change is not None:
+            self._on_change()
+
+    def as_dict(self) -> dict[str, dict[str, Any]]:
+        """Return the learned scene results as a JSON serializable dict."""
+        return {
+            str(scene): {"brightness": state.brightness, "kelvin": state.kelvin}
+            for scene, state in sorted(self._scenes.items())
+        }
+
+
+class SceneStore:
+    """Learned scene results of all lamps, kept across restarts."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the store."""
+        self._store: Store[dict[str, dict[str, Any]]] = Store(
+            hass, STORAGE_VERSION, STORAGE_KEY_SCENE_STATES
+        )
+        self._saved: dict[str, dict[str, Any]] = {}
+        self._lamps: dict[int, LampScenes] = {}
+        self._load_lock = asyncio.Lock()
+        self._loaded = False
+
+    async def async_load(self) -> None:
+        """Load the saved scene results, once."""
+        async with self._load_lock:
+            if self._loaded:
+                return
+            self._saved = await self._store.async_load() or {}
+            self._loaded = True
+
+    def lamp(self, lamp_id: int) -> LampScenes:
+        """Return the scene results of a lamp."""
+        scenes = self._lamps.get(lamp_id)
+        if scenes is None:
+            scenes = self._lamps[lamp_id] = LampScenes.from_dict(
+                self._saved.get(str(lamp_id), {}), self._async_schedule_save
+            )
+        return scenes
+
+    @callback
+    def _async_schedule_save(self) -> None:
+        """Save the scene results once changes stopped coming in for a while."""
+        self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY)
+
+    def _data_to_save(self) -> dict[str, dict[str, Any]]:
+        """Return the scene results of all lamps, including ones not set up right now."""
+        data = dict(self._saved)
+        for lamp_id, scenes in self._lamps.items():
+            data[str(lamp_id)] = scenes.as_dict()
+        return data
+
+
+async def async_get_scene_store(hass: HomeAssistant) -> SceneStore:
+    """Return the loaded scene store, creating it if needed."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    store: SceneStore | None = domain_data.get(DATA_SCENE_STATES)
+    if store is None:
+        store = domain_data[DATA_SCENE_STATES] = SceneStore(hass)
+    await store.async_load()
+    return store
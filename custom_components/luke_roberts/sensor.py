@@ -0,0 +1,118 @@
+"""Diagnostic sensors for the Luke Roberts integration."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.typing import StateType
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .account import async_get_account
+from .api import LukeRobertsApi
+from .const import CONF_API_TOKEN, CONF_LAMP_ID, DOMAIN
+from .coordinator import LukeRobertsCoordinator
+from .metrics import ApiMetrics
+
+
+def _milliseconds(seconds: float | None) -> float | None:
+    """Convert a latency in seconds to rounded milliseconds."""
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+@dataclass(frozen=True, kw_only=True)
+class LukeRobertsSensorEntityDescription(SensorEntityDescription):
+    """Describes a Luke Roberts diagnostic sensor."""
+
+    value_fn: Callable[[ApiMetrics], StateType]
+
+
+SENSORS: tuple[LukeRobertsSensorEntityDescription, ...] = (
+    LukeRobertsSensorEntityDescription(
+        key="cloud_requests",
+        name="Cloud requests",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.requests.count,
+    ),
+    LukeRobertsSensorEntityDescription(
+        key="cloud_errors",
+        name="Cloud errors",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.requests.errors + metrics.requests.timeouts,
+    ),
+    LukeRobertsSensorEntityDescription(
+        key="cloud_latency",
+        name="Cloud latency",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics: _milliseconds(metrics.requests.average),
+    ),
+    LukeRobertsSensorEntityDescription(
+        key="command_latency",
+        name="Command latency",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics: _milliseconds(metrics.commands.last),
+    ),
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up Luke Roberts diagnostic sensors from a config entry."""
+    api: LukeRobertsApi = hass.data[DOMAIN][config_entry.entry_id]
+    coordinator = async_get_account(hass, config_entry.data[CONF_API_TOKEN]).get_coordinator(hass)
+    lamp_id = config_entry.data[CONF_LAMP_ID]
+
+    async_add_entities(
+        LukeRobertsMetricSensor(coordinator, api, lamp_id, description)
+        for description in SENSORS
+    )
+
+
+class LukeRobertsMetricSensor(CoordinatorEntity[LukeRobertsCoordinator], SensorEntity):
+    """Cloud API metric of a Luke Roberts lamp, refreshed with every account poll."""
+
+    entity_description: LukeRobertsSensorEntityDescription
+
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(
+        self,
+        coordinator: LukeRobertsCoordinator,
+        api: LukeRobertsApi,
+        lamp_id: int,
+        description: LukeRobertsSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._api = api
+        self._attr_unique_id = f"luke_roberts_{lamp_id}_{description.key}"
+        self._attr_device_info = {"identifiers": {(DOMAIN, str(lamp_id))}}
+
+    @property
+    def available(self) -> bool:
+        """Metrics are available even while the cloud is not."""
+        return True
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the current metric value."""
+        return self.entity_description.value_fn(self._api.metrics)
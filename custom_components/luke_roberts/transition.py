@@ -0,0 +1,111 @@
+"""Client-side smooth transitions for Luke Roberts lamps.
+
+The cloud has no transition parameter, so fades are sent as a series of
+single-parameter commands. The number of steps is bounded by
+TRANSITION_MAX_STEPS and by the request budget of the account, so even
+long fades use a small, predictable number of cloud calls.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+import logging
+import time
+from typing import Any
+
+from .api import LukeRobertsApi, command_kind
+from .const import (
+    API_RATE_LIMIT,
+    ENDPOINT_LAMP_COMMAND,
+    TRANSITION_MAX_STEPS,
+    TRANSITION_MIN_STEP_INTERVAL,
+    TRANSITION_RATE_SHARE,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def step_interval(api: LukeRobertsApi, parameters: int, fading_lamps: int) -> float:
+    """Return the seconds between two steps of a fade.
+
+    A step must not be shorter than the measured latency of its commands,
+    and all lamps fading at the same time together use at most
+    TRANSITION_RATE_SHARE of the request budget of the account. Steps
+    further apart than the keep-warm window need a wake-up send each.
+    """
+    stats = api.metrics.endpoints.get(ENDPOINT_LAMP_COMMAND)
+    latency = stats.average if stats is not None and stats.average is not None else 0.0
+    # Requests per second this lamp may spend on its fade
+    budget = API_RATE_LIMIT * TRANSITION_RATE_SHARE / max(1, fading_lamps)
+
+    interval = max(TRANSITION_MIN_STEP_INTERVAL, latency * parameters, parameters / budget)
+    if interval > api.keep_warm:
+        interval = max(interval, 2 * parameters / budget)
+    return interval
+
+
+def plan_transition(
+    start: dict[str, int], target: dict[str, int], duration: float, interval: float
+) -> list[tuple[float, list[dict[str, Any]]]]:
+    """Split a fade into steps of single-parameter commands.
+
+    start and target map command kinds (e.g. "brightness", "kelvin") to
+    lamp values. Returns (offset in seconds, commands) per step. Kinds whose
+    rounded value did not change are left out of a step, and steps without
+    any change are left out entirely. The last step always sends the exact
+    target of every kind, even one that reached it earlier.
+    """
+    count = max(1, min(TRANSITION_MAX_STEPS, int(duration / interval)))
+    last = dict(start)
+    steps: list[tuple[float, list[dict[str, Any]]]] = []
+    for step in range(1, count + 1):
+        commands = []
+        for kind, value in target.items():
+            begin = start.get(kind, value)
+            current = round(begin + (value - begin) * step / count)
+            if current != last.get(kind) or step == count:
+                commands.append({kind: current})
+                last[kind] = current
+        if commands:
+            steps.append((duration * step / count, commands))
+    return steps
+
+
+async def async_run_transition(
+    api: LukeRobertsApi,
+    steps: list[tuple[float, list[dict[str, Any]]]],
+    on_step: Callable[[list[dict[str, Any]]], None],
+) -> dict[str, Any] | str | None:
+    """Send the steps of a fade through the command queue of a lamp.
+
+    If sending falls behind, steps whose successor is already due are
+    skipped, so a slow cloud shortens the fade instead of stretching it.
+    Kinds of a skipped step missing from its successor are sent with the
+    successor, so no value is lost. Cancelling stops the fade after the
+    step in flight. Returns the result of the last command sent.
+    """
+    begin = time.monotonic()
+    result: dict[str, Any] | str | None = None
+    # Commands of skipped steps by kind, the newest value per kind
+    skipped: dict[str, dict[str, Any]] = {}
+    for index, (offset, step_commands) in enumerate(steps):
+        kinds = {command_kind(command) for command in step_commands}
+        commands = [command for kind, command in skipped.items() if kind not in kinds] + step_commands
+        skipped.clear()
+        now = time.monotonic()
+        if index + 1 < len(steps) and begin + steps[index + 1][0] <= now:
+            for command in commands:
+                skipped[command_kind(command)] = command
+            continue
+        if (delay := begin + offset - now) > 0:
+            await asyncio.sleep(delay)
+        results = await api.queue_commands(commands)
+        result = results[-1]
+        on_step(commands)
+    _LOGGER.debug(
+        "Lamp %s: transition of %s steps done in %.1f seconds",
+        api.lamp_id,
+        len(steps),
+        time.monotonic() - begin,
+    )
+    return result
@@ -0,0 +1,126 @@
+"""Update transports bringing lamp state to the account coordinator."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import HomeAssistant
+
+from .api import LukeRobertsApiError, LukeRobertsAuthError, LukeRobertsPushUnsupportedError
+from .const import DOMAIN, PUSH_MAX_RECONNECT_DELAY, PUSH_RECONNECT_DELAY
+
+if TYPE_CHECKING:
+    from .coordinator import LukeRobertsCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+TRANSPORT_POLLING = "polling"
+TRANSPORT_STREAM = "stream"
+
+
+class UpdateTransport:
+    """Way lamp state reaches the coordinator besides its own polls.
+
+    While a transport is push_active, the coordinator stops polling and
+    relies on the transport to hand it every state change.
+    """
+
+    name = TRANSPORT_POLLING
+
+    def __init__(self, hass: HomeAssistant, coordinator: LukeRobertsCoordinator) -> None:
+        """Initialize the transport."""
+        self.hass = hass
+        self.coordinator = coordinator
+
+    @property
+    def push_active(self) -> bool:
+        """Return if state changes are currently pushed."""
+        return False
+
+    def start(self) -> None:
+        """Start delivering state, if the transport does anything on its own."""
+
+    def stop(self) -> None:
+        """Stop delivering state."""
+
+
+class PollingTransport(UpdateTransport):
+    """Lamp state only arrives through the polls of the coordinator."""
+
+
+class StreamTransport(UpdateTransport):
+    """Lamp state is pushed through the event stream of the cloud.
+
+    The stream is negotiated on start: if the cloud has none, the
+    coordinator falls back to a PollingTransport for good. While the stream
+    is down, the coordinator polls as usual and the stream is reconnected
+    with jittered exponential backoff.
+    """
+
+    name = TRANSPORT_STREAM
+
+    def __init__(self, hass: HomeAssistant, coordinator: LukeRobertsCoordinator) -> None:
+        """Initialize the transport."""
+        super().__init__(hass, coordinator)
+        self._connected = False
+        self._task: asyncio.Task | None = None
+
+    @property
+    def push_active(self) -> bool:
+        """Return if the event stream is open."""
+        return self._connected
+
+    def start(self) -> None:
+        """Open the event stream in the background."""
+        if self._task is None or self._task.done():
+            self._task = self.hass.async_create_background_task(
+                self._async_run(), name=f"{DOMAIN} event stream"
+            )
+
+    def stop(self) -> None:
+        """Close the event stream."""
+        # The stream task stops itself when it falls back to polling
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+            self._task = None
+        self._connected = False
+
+    async def _async_run(self) -> None:
+        """Keep the event stream open until stopped or found unsupported."""
+        delay = PUSH_RECONNECT_DELAY
+        while apis := self.coordinator.apis:
+            try:
+                async for event in apis[0].async_stream_events(self._on_connected):
+                    delay = PUSH_RECONNECT_DELAY
+                    self._handle_event(event)
+                _LOGGER.debug("Event stream closed by the cloud")
+            except LukeRobertsPushUnsupportedError as err:
+                _LOGGER.info("Push updates not available, polling lamp state: %s", err)
+                self.coordinator.async_set_transport(PollingTransport(self.hass, self.coordinator))
+                return
+            except LukeRobertsAuthError as err:
+                # The coordinator polls and reports invalid tokens
+                _LOGGER.debug("Event stream rejected: %s", err)
+            except LukeRobertsApiError as err:
+                _LOGGER.debug("Event stream interrupted: %s", err)
+
+            self._set_connected(False)
+            await asyncio.sleep(random.uniform(delay / 2, delay))
+            delay = min(PUSH_MAX_RECONNECT_DELAY, delay * 2)
+
+    def _on_connected(self) -> None:
+        """Note that the cloud accepted the event stream."""
+        _LOGGER.debug("Event stream open, pausing polls")
+        self._set_connected(True)
+
+    def _set_connected(self, connected: bool) -> None:
+        """Switch the coordinator between push and polling."""
+        if connected != self._connected:
+            self._connected = connected
+            self.coordinator.async_push_changed()
+
+    def _handle_event(self, event: dict[str, Any]) -> None:
+        """Hand the state of an event to the coordinator."""
+        self.coordinator.async_set_listing_entry(event)
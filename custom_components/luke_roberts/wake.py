@@ -0,0 +1,200 @@
+"""Learned BLE wake delay per lamp."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    BLE_WAKE_DELAY,
+    DATA_WAKE_DELAYS,
+    DOMAIN,
+    STORAGE_KEY_WAKE_DELAYS,
+    STORAGE_SAVE_DELAY,
+    STORAGE_VERSION,
+    WAKE_DELAY_MARGIN,
+    WAKE_DELAY_MAX,
+    WAKE_DELAY_MIN,
+    WAKE_FLOOR_DECAY_STREAK,
+    WAKE_SAMPLE_EVERY,
+    WAKE_TUNE_STEP,
+    WAKE_TUNE_STREAK,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class WakeDelayTuner:
+    """Learn the shortest delay after which the BLE bridge of a lamp forwards commands.
+
+    Each sample is the gap between a wake-up send and the first send after
+    it, and whether the state read back afterwards showed that send. After
+    WAKE_TUNE_STREAK successes at about the current delay, a delay
+    WAKE_TUNE_STEP shorter is tried.
+
+    A single lost send may have other causes, e.g. a cloud hiccup, so only a
+    second failure raises the floor, the longest gap seen failing, and the
+    delay is kept WAKE_DELAY_MARGIN above it. A success at a gap no longer
+    than a failed one clears that failure. The floor is not final either:
+    after WAKE_FLOOR_DECAY_STREAK successes in a row it is lowered by
+    WAKE_TUNE_STEP, so a bridge that got faster is noticed.
+    """
+
+    def __init__(
+        self,
+        delay: float = BLE_WAKE_DELAY,
+        floor: float = 0.0,
+        on_change: Callable[[], None] | None = None,
+    ) -> None:
+        """Initialize the tuner, on_change is called whenever a sample was recorded."""
+        self.floor = min(max(0.0, floor), WAKE_DELAY_MAX - WAKE_DELAY_MARGIN)
+        self.delay = min(WAKE_DELAY_MAX, max(delay, self.lowest))
+        self.samples = 0
+        self.failures = 0
+        self._streak = 0
+        self._wakes = 0
+        # Gap of a failure not confirmed by a second one yet
+        self._suspect: float | None = None
+        self._on_change = on_change
+
+    @classmethod
+    def from_dict(
+        cls, data: dict[str, Any], on_change: Callable[[], None] | None = None
+    ) -> WakeDelayTuner:
+        """Restore a tuner saved with as_dict."""
+        tuner = cls(float(data.get("delay", BLE_WAKE_DELAY)), float(data.get("floor", 0.0)), on_change)
+        tuner.samples = int(data.get("samples", 0))
+        tuner.failures = int(data.get("failures", 0))
+        return tuner
+
+    @property
+    def lowest(self) -> float:
+        """Return the shortest delay that may still be tried."""
+        return max(WAKE_DELAY_MIN, self.floor + WAKE_DELAY_MARGIN)
+
+    @property
+    def converged(self) -> bool:
+        """Return if no shorter delay is left to try."""
+        return self.delay - WAKE_TUNE_STEP < self.lowest
+
+    def wants_sample(self) -> bool:
+        """Return if the outcome of the current wake-up should be read back.
+
+        Every wake-up is checked while tuning or checking a failure,
+        afterwards every WAKE_SAMPLE_EVERY-th to notice bridges that got slower.
+        """
+        if not self.converged or self._suspect is not None:
+            return True
+        self._wakes += 1
+        return self._wakes % WAKE_SAMPLE_EVERY == 0
+
+    def record(self, gap: float, success: bool) -> None:
+        """Record whether the first send gap seconds after a wake-up reached the lamp."""
+        self.samples += 1
+        gap = round(gap, 2)
+        if success:
+            if self._suspect is not None and gap <= self._suspect:
+                # The bridge forwarded sends that early after all
+                self._suspect = None
+            # Success after a much longer gap says nothing about the current delay
+            if gap <= self.delay + WAKE_DELAY_MARGIN:
+                self._streak += 1
+                if self._streak >= WAKE_TUNE_STREAK and not self.converged:
+                    self.delay = round(self.delay - WAKE_TUNE_STEP, 2)
+                    self._streak = 0
+                    _LOGGER.debug("Trying a wake delay of %.2f seconds", self.delay)
+                elif self._streak >= WAKE_FLOOR_DECAY_STREAK and self.floor > 0:
+                    self.floor = max(0.0, round(self.floor - WAKE_TUNE_STEP, 2))
+                    self._streak = 0
+                    _LOGGER.debug("Trying wake delays down to %.2f seconds again", self.lowest)
+        else:
+            self.failures += 1
+            self._streak = 0
+            if self._suspect is None:
+                # Wait for a second failure before blaming the delay
+                self._suspect = gap
+                _LOGGER.debug("Send %.2f seconds after wake-up was lost, checking again", gap)
+            else:
+                # Both gaps up to the shorter one failed
+                failed = min(self._suspect, gap)
+                self._suspect = None
+                self.floor = min(max(self.floor, failed), WAKE_DELAY_MAX - WAKE_DELAY_MARGIN)
+            if self.delay < self.lowest:
+                self.delay = round(self.lowest, 2)
+                _LOGGER.debug(
+                    "Send %.2f seconds after wake-up was lost, raising the wake delay to %.2f",
+                    gap,
+                    self.delay,
+                )
+        if self._on_change is not None:
+            self._on_change()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the learned values as a JSON serializable dict."""
+        return {
+            "delay": self.delay,
+            "floor": self.floor,
+            "samples": self.samples,
+            "failures": self.failures,
+            "converged": self.converged,
+        }
+
+
+class WakeDelayStore:
+    """Learned wake delays of all lamps, kept across restarts."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the store."""
+        self._store: Store[dict[str, dict[str, Any]]] = Store(
+            hass, STORAGE_VERSION, STORAGE_KEY_WAKE_DELAYS
+        )
+        self._saved: dict[str, dict[str, Any]] = {}
+        self._tuners: dict[int, WakeDelayTuner] = {}
+        self._load_lock = asyncio.Lock()
+        self._loaded = False
+
+    async def async_load(self) -> None:
+        """Load the saved delays, once."""
+        async with self._load_lock:
+            if self._loaded:
+                return
+            self._saved = await self._store.async_load() or {}
+            self._loaded = True
+
+    def tuner(self, lamp_id: int) -> WakeDelayTuner:
+        """Return the tuner of a lamp, starting from its saved delay."""
+        tuner = self._tuners.get(lamp_id)
+        if tuner is None:
+            saved = self._saved.get(str(lamp_id))
+            if saved is None:
+                tuner = WakeDelayTuner(on_change=self._async_schedule_save)
+            else:
+                tuner = WakeDelayTuner.from_dict(saved, self._async_schedule_save)
+            self._tuners[lamp_id] = tuner
+        return tuner
+
+    @callback
+    def _async_schedule_save(self) -> None:
+        """Save the delays once changes stopped coming in for a while."""
+        self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY)
+
+    def _data_to_save(self) -> dict[str, dict[str, Any]]:
+        """Return the delays of all lamps, including ones not set up right now."""
+        data = dict(self._saved)
+        for lamp_id, tuner in self._tuners.items():
+            data[str(lamp_id)] = tuner.as_dict()
+        return data
+
+
+async def async_get_wake_delay_store(hass: HomeAssistant) -> WakeDelayStore:
+    """Return the loaded wake delay store, creating it if needed."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    store: WakeDelayStore | None = domain_data.get(DATA_WAKE_DELAYS)
+    if store is None:
+        store = domain_data[DATA_WAKE_DELAYS] = WakeDelayStore(hass)
+    await store.async_load()
+    return store
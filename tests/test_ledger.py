@@ -0,0 +1,69 @@
+"""Tests for the pending command ledger."""
+from __future__ import annotations
+
+from datetime import timedelta
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+import homeassistant.util.dt as dt_util  # noqa: E402
+
+from custom_components.luke_roberts.api import BUFFERED_RESULT  # noqa: E402
+from custom_components.luke_roberts.const import STATE_OFF  # noqa: E402
+from custom_components.luke_roberts.ledger import PendingCommandLedger  # noqa: E402
+from custom_components.luke_roberts.models import LampState  # noqa: E402
+
+
+def _state(on: bool, seconds: float) -> LampState:
+    """Return a lamp state last updated seconds from now."""
+    updated = dt_util.utcnow() + timedelta(seconds=seconds)
+    return LampState(on=on, online=True, updated_at=updated.isoformat())
+
+
+def _sent_off() -> PendingCommandLedger:
+    """Return a ledger with a power off that was just sent."""
+    ledger = PendingCommandLedger()
+    command = {"power": STATE_OFF}
+    ledger.add([command])
+    ledger.mark_sent([command])
+    return ledger
+
+
+def test_older_state_is_stale() -> None:
+    """A state last updated before the command was sent does not undo it."""
+    ledger = _sent_off()
+    assert ledger.stale_kinds(_state(True, -5)) == {"power"}
+    assert ledger.pending_kinds == ["power"]
+
+
+def test_state_showing_command_settles() -> None:
+    """A state showing the command settles its entry."""
+    ledger = _sent_off()
+    assert ledger.stale_kinds(_state(False, -5)) == set()
+    assert ledger.pending_kinds == []
+
+
+def test_newer_state_wins() -> None:
+    """A state updated after the send that shows something else wins."""
+    ledger = _sent_off()
+    assert ledger.stale_kinds(_state(True, 5)) == set()
+    assert ledger.pending_kinds == []
+
+
+def test_entry_times_out() -> None:
+    """After PENDING_COMMAND_TIMEOUT the polled state wins."""
+    ledger = _sent_off()
+    ledger._entries["power"].expires = 0  # noqa: SLF001
+    assert ledger.stale_kinds(_state(True, -5)) == set()
+
+
+def test_buffered_command_stays_pending_until_replayed() -> None:
+    """A command buffered for an offline lamp does not time out before its replay was sent."""
+    ledger = PendingCommandLedger()
+    command = {"power": STATE_OFF}
+    ledger.add([command])
+    ledger.mark_sent([command], [BUFFERED_RESULT])
+    assert ledger.stale_kinds(_state(True, 5)) == {"power"}
+    ledger.replayed({"power": STATE_OFF}, True)
+    assert ledger.stale_kinds(_state(True, 5)) == set()
@@ -0,0 +1,53 @@
+"""Tests for the Luke Roberts light entity."""
+from __future__ import annotations
+
+from unittest.mock import MagicMock
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.luke_roberts.const import STATE_OFF  # noqa: E402
+from custom_components.luke_roberts.light import LukeRobertsLight  # noqa: E402
+from custom_components.luke_roberts.models import LampState  # noqa: E402
+
+LAMP_ID = 1
+STATE = LampState(on=True, online=True, brightness=40, kelvin=3000)
+
+
+def _light(state: LampState) -> LukeRobertsLight:
+    """Return a light that applied a state, with the coordinator reporting it unchanged."""
+    coordinator = MagicMock()
+    coordinator.data = {LAMP_ID: state}
+    coordinator.last_update_success = True
+    coordinator.lamp_changed.return_value = False
+    entry = MagicMock()
+    entry.options = {}
+    light = LukeRobertsLight(coordinator, MagicMock(), "Lamp", LAMP_ID, entry)
+    light.async_write_ha_state = MagicMock()
+    light._apply_state(state)  # noqa: SLF001
+    return light
+
+
+def test_unchanged_state_is_skipped() -> None:
+    """A poll without changes is not written again."""
+    light = _light(STATE)
+    light._handle_coordinator_update()  # noqa: SLF001
+    light.async_write_ha_state.assert_not_called()
+
+
+def test_unchanged_state_replaces_optimistic_values() -> None:
+    """Optimistic values the lamp never applied give way to an unchanged state."""
+    light = _light(STATE)
+    light._attr_is_on = False  # noqa: SLF001
+    light._handle_coordinator_update()  # noqa: SLF001
+    assert light.is_on is True
+    light.async_write_ha_state.assert_called_once()
+
+
+def test_unchanged_state_settles_pending_commands() -> None:
+    """Pending commands are checked against unchanged states too, so they can time out."""
+    light = _light(STATE)
+    light.ledger.add([{"power": STATE_OFF}])
+    light._handle_coordinator_update()  # noqa: SLF001
+    light.async_write_ha_state.assert_called_once()
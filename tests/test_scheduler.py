@@ -0,0 +1,63 @@
+"""Tests for the per-lamp command scheduler."""
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.luke_roberts.api import CommandScheduler  # noqa: E402
+
+
+class _FakeApi:
+    """Stand-in for the API client with a slow bridge wake-up."""
+
+    lamp_id = 1
+    online = True
+    confirm_commands = False
+
+    def __init__(self) -> None:
+        self.woken: list[dict[str, Any]] = []
+        self.sent: list[dict[str, Any]] = []
+        self.metrics = MagicMock()
+
+    async def async_wake_bridge(self, command: dict[str, Any]) -> None:
+        self.woken.append(command)
+        await asyncio.sleep(0.05)
+
+    async def async_send_on_warm_bridge(self, command: dict[str, Any]) -> dict[str, Any]:
+        self.sent.append(command)
+        return {"sent": command}
+
+
+def test_latest_command_of_a_kind_wins() -> None:
+    """Commands of a kind queued while waking the bridge are coalesced into the newest."""
+
+    async def run() -> tuple[_FakeApi, list[Any]]:
+        api = _FakeApi()
+        scheduler = CommandScheduler(api)  # type: ignore[arg-type]
+        first = asyncio.ensure_future(scheduler.submit({"brightness": 10}))
+        await asyncio.sleep(0.01)
+        rest = [asyncio.ensure_future(scheduler.submit({"brightness": value})) for value in (20, 30)]
+        return api, await asyncio.gather(first, *rest)
+
+    api, results = asyncio.run(run())
+    assert api.woken == [{"brightness": 10}]
+    assert api.sent == [{"brightness": 30}]
+    assert results == [{"sent": {"brightness": 30}}] * 3
+
+
+def test_kinds_keep_their_order() -> None:
+    """A batch of different kinds is sent in order, after a single wake-up."""
+
+    async def run() -> _FakeApi:
+        api = _FakeApi()
+        scheduler = CommandScheduler(api)  # type: ignore[arg-type]
+        await scheduler.submit_batch([{"power": "ON"}, {"brightness": 40}, {"kelvin": 3000}])
+        return api
+
+    api = asyncio.run(run())
+    assert api.sent == [{"power": "ON"}, {"brightness": 40}, {"kelvin": 3000}]
@@ -0,0 +1,61 @@
+"""Tests for client-side transitions."""
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.luke_roberts.transition import async_run_transition, plan_transition  # noqa: E402
+
+
+def test_last_step_sends_full_target() -> None:
+    """The last step carries every kind, even one that reached its target earlier."""
+    steps = plan_transition({"brightness": 1, "kelvin": 3000}, {"brightness": 100, "kelvin": 3005}, 60, 1)
+    offset, commands = steps[-1]
+    assert offset == 60
+    assert commands == [{"brightness": 100}, {"kelvin": 3005}]
+
+
+def test_unchanged_values_are_left_out() -> None:
+    """Steps only carry kinds whose rounded value changed."""
+    steps = plan_transition({"brightness": 1, "kelvin": 3000}, {"brightness": 100, "kelvin": 3005}, 60, 1)
+    kelvin_steps = [commands for _, commands in steps[:-1] if any("kelvin" in command for command in commands)]
+    assert len(kelvin_steps) == 5
+    assert all(len(commands) <= 2 for _, commands in steps)
+
+
+def test_step_count_is_bounded() -> None:
+    """Long fades use at most TRANSITION_MAX_STEPS steps."""
+    steps = plan_transition({"brightness": 1}, {"brightness": 100}, 3600, 1)
+    assert len(steps) <= 60
+    assert steps[-1] == (3600, [{"brightness": 100}])
+
+
+class _SlowApi:
+    """Stand-in for the API client whose first batch takes long."""
+
+    lamp_id = 1
+
+    def __init__(self) -> None:
+        self.batches: list[list[dict[str, Any]]] = []
+
+    async def queue_commands(self, commands: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        if not self.batches:
+            await asyncio.sleep(0.05)
+        self.batches.append(commands)
+        return [{}] * len(commands)
+
+
+def test_skipped_step_is_folded_into_next() -> None:
+    """Kinds of a step skipped while falling behind are sent with the step replacing it."""
+    api = _SlowApi()
+    steps = [
+        (0.0, [{"brightness": 2}]),
+        (0.01, [{"brightness": 3}, {"kelvin": 3001}]),
+        (0.02, [{"brightness": 4}]),
+    ]
+    asyncio.run(async_run_transition(api, steps, lambda commands: None))  # type: ignore[arg-type]
+    assert api.batches == [[{"brightness": 2}], [{"kelvin": 3001}, {"brightness": 4}]]
@@ -0,0 +1,50 @@
+"""Tests for the learned BLE wake delay."""
+from __future__ import annotations
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.luke_roberts.const import WAKE_DELAY_MARGIN  # noqa: E402
+from custom_components.luke_roberts.wake import WakeDelayTuner  # noqa: E402
+
+
+def _simulate(tuner: WakeDelayTuner, bridge_delay: float, wakes: int) -> None:
+    """Wake a bridge that forwards sends bridge_delay seconds after a wake-up."""
+    for _ in range(wakes):
+        if tuner.wants_sample():
+            tuner.record(tuner.delay, tuner.delay >= bridge_delay)
+
+
+def test_single_failure_keeps_floor() -> None:
+    """A single lost send does not raise the floor."""
+    tuner = WakeDelayTuner(delay=1.5, floor=1.0)
+    tuner.record(4.0, False)
+    assert tuner.floor == 1.0
+    assert tuner.delay == 1.5
+
+
+def test_second_failure_raises_floor() -> None:
+    """Two lost sends raise the floor to the shorter of their gaps."""
+    tuner = WakeDelayTuner(delay=1.5, floor=1.0)
+    tuner.record(2.0, False)
+    tuner.record(1.8, False)
+    assert tuner.floor == 1.8
+    assert tuner.delay == 1.8 + WAKE_DELAY_MARGIN
+
+
+def test_success_clears_failure() -> None:
+    """A success at the gap of a lost send shows the loss had other causes."""
+    tuner = WakeDelayTuner(delay=1.5, floor=1.0)
+    tuner.record(1.5, False)
+    tuner.record(1.5, True)
+    tuner.record(1.5, False)
+    assert tuner.floor == 1.0
+
+
+def test_floor_recovers() -> None:
+    """A floor raised too high is lowered again once the bridge keeps forwarding."""
+    tuner = WakeDelayTuner(delay=5.0, floor=4.5)
+    _simulate(tuner, 1.1, 3000)
+    assert tuner.floor < 1.1
+    assert tuner.delay - WAKE_DELAY_MARGIN <= 1.1 + 0.25